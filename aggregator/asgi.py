@@ -0,0 +1,7 @@
+import os
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'aggregator.settings')
+# Serve the upstream proxies with the non-blocking views from api/async_views.py
+os.environ.setdefault('AGGREGATOR_ASYNC_VIEWS', '1')
+application = get_asgi_application()
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -15,6 +16,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'api.middleware.CompressionMiddleware',
     'django.middleware.common.CommonMiddleware',
 ]
 
@@ -34,6 +36,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'aggregator.wsgi.application'
+ASGI_APPLICATION = 'aggregator.asgi.application'
 
 DATABASES = {}
 
@@ -42,5 +45,7 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 
 CORS_ALLOW_ALL_ORIGINS = True
 JUPITER_API_URL = 'https://lite-api.jup.ag'
+# Set by aggregator/asgi.py: proxy views use the async HTTP client
+ASYNC_UPSTREAM_VIEWS = os.environ.get('AGGREGATOR_ASYNC_VIEWS', '0') == '1'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -0,0 +1,161 @@
+import json
+import requests
+from asgiref.sync import sync_to_async
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from django.utils.decorators import method_decorator
+from .cache import proxy_cache, order_flight
+from .responses import JsonResponse
+from .price_history import COINGECKO_IDS, load_price_history, parse_days, parse_points, downsample_lttb
+from .upstream import async_jupiter, ASYNC_UPSTREAM_ERRORS
+from .views import _upstream_error
+
+# Non-blocking versions of the upstream proxy views, served under ASGI
+# (see aggregator/asgi.py). Request/response shapes match api/views.py.
+
+async def _acached_jupiter_get(endpoint, path, params=None):
+    async def load():
+        response = await async_jupiter.get(path, endpoint=endpoint, params=params)
+        if response.status_code >= 500:
+            response.raise_for_status()
+        return response.status_code, response.json()
+
+    key = (path, tuple(sorted((params or {}).items())))
+    (status, payload), cache_state = await proxy_cache.afetch(
+        endpoint, key, load, cacheable=lambda value: value[0] < 400
+    )
+    response = JsonResponse(payload, safe=False)
+    response['X-Cache'] = cache_state
+    return response
+
+
+class SearchTokenView(View):
+    #Async proxy for Jupiter token search API
+
+    async def get(self, request):
+        query = request.GET.get('query', '')
+
+        if not query:
+            return JsonResponse({'error': 'Query parameter is required'}, status=400)
+
+        try:
+            return await _acached_jupiter_get('search', '/ultra/v1/search', params={'query': query})
+        except ASYNC_UPSTREAM_ERRORS as e:
+            return _upstream_error(e)
+
+
+class ShieldView(View):
+    #Async proxy for Jupiter Shield API - token warnings
+
+    async def get(self, request):
+        mints = request.GET.get('mints', '')
+
+        if not mints:
+            return JsonResponse({'error': 'Mints parameter is required'}, status=400)
+
+        try:
+            return await _acached_jupiter_get('shield', '/ultra/v1/shield', params={'mints': mints})
+        except ASYNC_UPSTREAM_ERRORS as e:
+            return _upstream_error(e)
+
+
+class OrderView(View):
+    #Async proxy for Jupiter Order API - get swap quote
+
+    async def get(self, request):
+        input_mint = request.GET.get('inputMint')
+        output_mint = request.GET.get('outputMint')
+        amount = request.GET.get('amount')
+        taker = request.GET.get('taker')
+
+        if not all([input_mint, output_mint, amount]):
+            return JsonResponse({
+                'error': 'inputMint, outputMint, and amount are required'
+            }, status=400)
+
+        params = {
+            'inputMint': input_mint,
+            'outputMint': output_mint,
+            'amount': amount,
+        }
+
+        if taker:
+            params['taker'] = taker
+
+        async def load():
+            response = await async_jupiter.get('/ultra/v1/order', endpoint='order', params=params)
+            return response.status_code, response.json()
+
+        try:
+            key = tuple(sorted(params.items()))
+            (status, payload), shared = await order_flight.ado(key, load, cacheable=lambda value: value[0] < 400)
+            response = JsonResponse(payload, safe=False)
+            response['X-Coalesced'] = 'true' if shared else 'false'
+            return response
+        except ASYNC_UPSTREAM_ERRORS as e:
+            return _upstream_error(e)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ExecuteView(View):
+    #Async proxy for Jupiter Execute API - execute swap
+
+    async def post(self, request):
+        try:
+            data = json.loads(request.body)
+        except json.JSONDecodeError:
+            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+
+        signed_transaction = data.get('signedTransaction')
+        request_id = data.get('requestId')
+
+        if not all([signed_transaction, request_id]):
+            return JsonResponse({
+                'error': 'signedTransaction and requestId are required'
+            }, status=400)
+
+        try:
+            response = await async_jupiter.post(
+                '/ultra/v1/execute',
+                endpoint='execute',
+                json={
+                    'signedTransaction': signed_transaction,
+                    'requestId': request_id,
+                }
+            )
+            return JsonResponse(response.json(), safe=False)
+        except ASYNC_UPSTREAM_ERRORS as e:
+            return _upstream_error(e)
+
+
+class HoldingsView(View):
+    #Async proxy for Jupiter Holdings API - wallet balances
+
+    async def get(self, request, address):
+        if not address:
+            return JsonResponse({'error': 'Address is required'}, status=400)
+
+        try:
+            return await _acached_jupiter_get('holdings', f'/ultra/v1/holdings/{address}')
+        except ASYNC_UPSTREAM_ERRORS as e:
+            return _upstream_error(e)
+
+
+class PriceHistoryView(View):
+    #Token price history for charts - local store reads run in a worker thread
+
+    COINGECKO_IDS = COINGECKO_IDS
+
+    async def get(self, request, token):
+        days = request.GET.get('days', '1')  # 1, 7, 30, 365
+        points = parse_points(request.GET.get('points'))
+        try:
+            prices = await sync_to_async(load_price_history, thread_sensitive=False)(token, parse_days(days))
+            prices = downsample_lttb(prices, points)
+            return JsonResponse({
+                'token': token.upper(),
+                'prices': prices,  # [[timestamp, price], ...]
+                'days': days
+            })
+        except requests.RequestException as e:
+            return _upstream_error(e)
@@ -1,22 +1,107 @@
+import multiprocessing
 import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import jwt
 import bcrypt
 from datetime import datetime, timedelta
 from functools import wraps
-from django.http import JsonResponse
+from .responses import JsonResponse
+from .cache import LRUCache
 
 JWT_SECRET = os.environ.get('JWT_SECRET', 'your-super-secret-key-change-in-production')
 JWT_ALGORITHM = 'HS256'
 JWT_EXPIRATION_HOURS = 24
+TOKEN_CACHE_MAX_ENTRIES = int(os.environ.get('TOKEN_CACHE_MAX_ENTRIES', '10000'))
 
-def hash_password(password: str) -> str:
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
+# bcrypt cost for new hashes; stored hashes at another cost are upgraded on login
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', '12'))
+# Hashing runs in a separate process pool so login bursts don't hold request
+# threads on CPU. 0 workers hashes inline (tests, one-off commands).
+PASSWORD_POOL_WORKERS = int(os.environ.get('PASSWORD_POOL_WORKERS', str(min(4, os.cpu_count() or 1))))
+PASSWORD_POOL_MAX_PENDING = int(os.environ.get('PASSWORD_POOL_MAX_PENDING', str(max(1, PASSWORD_POOL_WORKERS) * 8)))
+
+ADMIN_EMAIL = os.environ.get('AGGREGATOR_ADMIN_EMAIL', 'admin@aggregator.local').lower()
+DANIYAR_ADMIN_EMAIL = 'daniyar@gmail.com'
+ADMIN_EMAILS = [ADMIN_EMAIL, DANIYAR_ADMIN_EMAIL]
+_ADMIN_EMAILS_LOWER = frozenset(email.lower() for email in ADMIN_EMAILS)
+
+# token -> (user_id, email, is_admin, exp unix seconds), filled after a full
+# jwt.decode so repeat requests with the same session skip the HMAC check
+_verified_tokens = LRUCache(TOKEN_CACHE_MAX_ENTRIES)
+# Revoked token -> exp; per process, entries are dropped once they expire
+_revoked_tokens = {}
+_revoked_lock = threading.Lock()
+
+def is_admin_email(email):
+    return (email or '').strip().lower() in _ADMIN_EMAILS_LOWER
+
+class PasswordHasherBusy(Exception):
+    #Raised instead of queueing when the password pool backlog is full
+    pass
+
+_pool = None
+_pool_lock = threading.Lock()
+_pool_slots = threading.BoundedSemaphore(PASSWORD_POOL_MAX_PENDING)
+
+def _bcrypt_hash(password: str, rounds: int) -> str:
+    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds))
     return hashed.decode('utf-8')
 
-def verify_password(password: str, hashed: str) -> bool:
+def _bcrypt_check(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
 
+def _run_in_pool(func, *args):
+    if PASSWORD_POOL_WORKERS <= 0:
+        return func(*args)
+    if not _pool_slots.acquire(blocking=False):
+        raise PasswordHasherBusy('Too many login attempts in progress, retry shortly')
+    try:
+        pool = _get_pool()
+        try:
+            return pool.submit(func, *args).result()
+        except BrokenProcessPool:
+            # A worker died (OOM kill, segfault); the executor never recovers
+            # by itself, so swap in a fresh one and retry once
+            _discard_pool(pool)
+            return _get_pool().submit(func, *args).result()
+    finally:
+        _pool_slots.release()
+
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: forking a process that already runs background threads
+            # (price oracle, group commit) is unsafe
+            _pool = ProcessPoolExecutor(
+                max_workers=PASSWORD_POOL_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _pool
+
+def hash_password(password: str) -> str:
+    return _run_in_pool(_bcrypt_hash, password, BCRYPT_ROUNDS)
+
+def verify_password(password: str, hashed: str) -> bool:
+    return _run_in_pool(_bcrypt_check, password, hashed)
+
+def needs_rehash(hashed: str) -> bool:
+    # bcrypt hashes look like $2b$<cost>$<salt+hash>
+    try:
+        return int(hashed.split('$')[2]) != BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
 def create_token(user_id: int, email: str) -> str:
     payload = {
         'user_id': user_id,
@@ -35,6 +120,37 @@ def decode_token(token: str) -> dict | None:
     except jwt.InvalidTokenError:
         return None
 
+def verify_token(token: str) -> tuple | None:
+    # Returns (user_id, email, is_admin, exp) or None for bad, expired or
+    # revoked tokens
+    if token in _revoked_tokens:
+        return None
+    cached = _verified_tokens.get(token)
+    if cached is not None:
+        if cached[3] > time.time():
+            return cached
+        _verified_tokens.pop(token)
+        return None
+
+    payload = decode_token(token)
+    if not payload:
+        return None
+    verified = (payload['user_id'], payload['email'], is_admin_email(payload['email']), payload['exp'])
+    _verified_tokens.set(token, verified)
+    return verified
+
+def revoke_token(token: str):
+    payload = decode_token(token)
+    if not payload:
+        return
+    now = time.time()
+    with _revoked_lock:
+        for revoked, exp in list(_revoked_tokens.items()):
+            if exp <= now:
+                del _revoked_tokens[revoked]
+        _revoked_tokens[token] = payload['exp']
+    _verified_tokens.pop(token)
+
 def get_token_from_request(request) -> str | None:
     auth_header = request.headers.get('Authorization', '')
     if auth_header.startswith('Bearer '):
@@ -47,10 +163,9 @@ def login_required(view_func):
         token = get_token_from_request(request)
         if not token:
             return JsonResponse({'error': 'Authentication required'}, status=401)
-        payload = decode_token(token)
-        if not payload:
+        verified = verify_token(token)
+        if not verified:
             return JsonResponse({'error': 'Invalid or expired token'}, status=401)
-        request.user_id = payload['user_id']
-        request.user_email = payload['email']
+        request.user_id, request.user_email, request.is_admin, _ = verified
         return view_func(self, request, *args, **kwargs)
     return wrapper
@@ -0,0 +1,352 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+
+PROXY_CACHE_MAX_ENTRIES = int(os.environ.get('PROXY_CACHE_MAX_ENTRIES', '2048'))
+ORDER_COALESCE_REUSE_SECONDS = float(os.environ.get('ORDER_COALESCE_REUSE_SECONDS', '1.0'))
+
+# Per-endpoint (fresh ttl, stale-while-revalidate window) in seconds
+PROXY_CACHE_TTLS = {
+    'search': (60, 300),
+    'shield': (300, 1800),
+    'holdings': (15, 60),
+}
+
+CACHE_HIT = 'HIT'
+CACHE_MISS = 'MISS'
+CACHE_STALE = 'STALE'
+CACHE_ERROR = 'STALE-IF-ERROR'
+
+
+class LRUCache:
+    #Thread-safe bounded mapping, evicts the least recently used key when full
+
+    def __init__(self, max_entries):
+        self.max_entries = max(1, int(max_entries))
+        self.evictions = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._items:
+                return default
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        with self._lock:
+            return self._items.pop(key, default)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class _Entry:
+    __slots__ = ('value', 'fresh_until', 'stale_until')
+
+    def __init__(self, value, fresh_until, stale_until):
+        self.value = value
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+
+
+class ResponseCache:
+    #TTL cache with stale-while-revalidate and stale-if-error semantics.
+    #Any object with get/set/clear/__len__ can be plugged in as the store.
+
+    def __init__(self, ttls, store=None):
+        self.ttls = dict(ttls)
+        self.store = store if store is not None else LRUCache(PROXY_CACHE_MAX_ENTRIES)
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._tasks = set()
+        self._counters = {'hits': 0, 'misses': 0, 'stale': 0, 'errors': 0}
+
+    def fetch(self, endpoint, key, loader, cacheable=None):
+        # Returns (value, cache_state). loader() is only called on a miss or
+        # after the stale window; stale entries are refreshed in the background.
+        cache_key = (endpoint, key)
+        entry = self.store.get(cache_key)
+        now = time.monotonic()
+
+        if entry is not None and now < entry.fresh_until:
+            self._count('hits')
+            return entry.value, CACHE_HIT
+
+        if entry is not None and now < entry.stale_until:
+            self._count('stale')
+            self._revalidate(endpoint, cache_key, loader, cacheable)
+            return entry.value, CACHE_STALE
+
+        self._count('misses')
+        try:
+            value = loader()
+        except Exception:
+            if entry is None:
+                raise
+            # Upstream is failing - the last good copy beats an error page
+            self._count('errors')
+            return entry.value, CACHE_ERROR
+
+        self._store(endpoint, cache_key, value, cacheable)
+        return value, CACHE_MISS
+
+    async def afetch(self, endpoint, key, loader, cacheable=None):
+        # Same as fetch() for coroutine loaders; revalidation runs as a task
+        cache_key = (endpoint, key)
+        entry = self.store.get(cache_key)
+        now = time.monotonic()
+
+        if entry is not None and now < entry.fresh_until:
+            self._count('hits')
+            return entry.value, CACHE_HIT
+
+        if entry is not None and now < entry.stale_until:
+            self._count('stale')
+            self._arevalidate(endpoint, cache_key, loader, cacheable)
+            return entry.value, CACHE_STALE
+
+        self._count('misses')
+        try:
+            value = await loader()
+        except Exception:
+            if entry is None:
+                raise
+            self._count('errors')
+            return entry.value, CACHE_ERROR
+
+        self._store(endpoint, cache_key, value, cacheable)
+        return value, CACHE_MISS
+
+    def invalidate(self, endpoint, key):
+        self.store.pop((endpoint, key))
+
+    def clear(self):
+        self.store.clear()
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        lookups = counters['hits'] + counters['stale'] + counters['misses']
+        served = counters['hits'] + counters['stale']
+        counters.update({
+            'size': len(self.store),
+            'maxEntries': getattr(self.store, 'max_entries', None),
+            'evictions': getattr(self.store, 'evictions', 0),
+            'hitRatio': round(served / lookups, 4) if lookups else 0.0,
+        })
+        return counters
+
+    def _store(self, endpoint, cache_key, value, cacheable):
+        if cacheable is not None and not cacheable(value):
+            return
+        ttl, stale = self.ttls.get(endpoint, (0, 0))
+        if ttl <= 0:
+            return
+        now = time.monotonic()
+        self.store.set(cache_key, _Entry(value, now + ttl, now + ttl + stale))
+
+    def _revalidate(self, endpoint, cache_key, loader, cacheable):
+        with self._lock:
+            if cache_key in self._refreshing:
+                return
+            self._refreshing.add(cache_key)
+
+        def refresh():
+            try:
+                self._store(endpoint, cache_key, loader(), cacheable)
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing.discard(cache_key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def _arevalidate(self, endpoint, cache_key, loader, cacheable):
+        with self._lock:
+            if cache_key in self._refreshing:
+                return
+            self._refreshing.add(cache_key)
+
+        async def refresh():
+            try:
+                self._store(endpoint, cache_key, await loader(), cacheable)
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing.discard(cache_key)
+
+        task = asyncio.get_running_loop().create_task(refresh())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+
+class _Call:
+    __slots__ = ('event', 'value', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    #Concurrent calls for the same key share one loader call; a successful
+    #result is then reused for reuse_seconds.
+
+    def __init__(self, reuse_seconds=0.0, max_entries=1024):
+        self.reuse_seconds = reuse_seconds
+        self._recent = LRUCache(max_entries)
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._acalls = {}
+        self._counters = {'upstream': 0, 'coalesced': 0, 'reused': 0}
+
+    def do(self, key, loader, cacheable=None):
+        # Returns (value, shared) - shared is True when no loader call was made
+        value = self._reused(key)
+        if value is not None:
+            return value, True
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.event.wait()
+            self._count('coalesced')
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+
+        self._count('upstream')
+        try:
+            call.value = loader()
+            self._remember(key, call.value, cacheable)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+        return call.value, False
+
+    async def ado(self, key, loader, cacheable=None):
+        value = self._reused(key)
+        if value is not None:
+            return value, True
+
+        # The loader runs as its own task and every caller, the first one
+        # included, awaits it through shield(): a caller cancelled on client
+        # disconnect leaves the call running for the others.
+        task = self._acalls.get(key)
+        if task is not None:
+            self._count('coalesced')
+            return await asyncio.shield(task), True
+
+        task = asyncio.get_running_loop().create_task(self._aload(key, loader, cacheable))
+        self._acalls[key] = task
+        task.add_done_callback(lambda done: self._aforget(key, done))
+        self._count('upstream')
+        return await asyncio.shield(task), False
+
+    async def _aload(self, key, loader, cacheable):
+        value = await loader()
+        self._remember(key, value, cacheable)
+        return value
+
+    def _aforget(self, key, task):
+        if self._acalls.get(key) is task:
+            del self._acalls[key]
+        # Mark retrieved so a failure nobody awaited anymore isn't logged as unhandled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def _reused(self, key):
+        recent = self._recent.get(key)
+        if recent is None:
+            return None
+        value, expires_at = recent
+        if time.monotonic() >= expires_at:
+            self._recent.pop(key)
+            return None
+        self._count('reused')
+        return value
+
+    def _remember(self, key, value, cacheable):
+        if self.reuse_seconds <= 0 or (cacheable is not None and not cacheable(value)):
+            return
+        self._recent.set(key, (value, time.monotonic() + self.reuse_seconds))
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+
+class VersionedCache:
+    #Per-key values tagged with the version of the data they were built from.
+    #Callers read the current version from the database on every request, so
+    #a write committed by any worker process retires the value everywhere.
+
+    def __init__(self, max_entries):
+        self.store = LRUCache(max_entries)
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'stale': 0}
+
+    def get(self, key, version):
+        entry = self.store.get(key)
+        if entry is None:
+            self._count('misses')
+            return None
+        if entry[0] != version:
+            self._count('stale')
+            return None
+        self._count('hits')
+        return entry[1]
+
+    def set(self, key, version, value):
+        # A slow loader storing an older version only costs the next reader a miss
+        self.store.set(key, (version, value))
+
+    def clear(self):
+        self.store.clear()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, entries=len(self.store))
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+
+proxy_cache = ResponseCache(PROXY_CACHE_TTLS)
+order_flight = SingleFlight(ORDER_COALESCE_REUSE_SECONDS)
@@ -1,9 +1,62 @@
 import os
-from sqlalchemy import create_engine, inspect, text
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 DATABASE_URL = os.environ.get('DATABASE_URL', 'sqlite:///./aggregator_clean.db')
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False}, echo=False)
+DB_ECHO = os.environ.get('DB_ECHO', '0') == '1'
+
+# SQLite: applied to every new connection
+SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE = int(os.environ.get('SQLITE_CACHE_SIZE', '-65536'))  # negative = KiB
+
+# Server databases (Postgres): QueuePool sizing
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '10'))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', '20'))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '30'))
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', '1800'))
+DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', '1') == '1'
+
+def create_db_engine(url=DATABASE_URL):
+    url = make_url(url)
+    if url.get_backend_name() != 'sqlite':
+        return create_engine(
+            url,
+            echo=DB_ECHO,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING
+        )
+
+    sqlite_engine = create_engine(
+        url,
+        echo=DB_ECHO,
+        connect_args={'check_same_thread': False, 'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000}
+    )
+    in_memory = url.database in (None, '', ':memory:')
+
+    @event.listens_for(sqlite_engine, 'connect')
+    def _sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            if not in_memory:
+                # WAL lets readers run alongside the single writer
+                cursor.execute(f'PRAGMA journal_mode={SQLITE_JOURNAL_MODE}')
+                cursor.execute(f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}')
+            cursor.execute(f'PRAGMA synchronous={SQLITE_SYNCHRONOUS}')
+            cursor.execute(f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}')
+            cursor.execute(f'PRAGMA cache_size={SQLITE_CACHE_SIZE}')
+        finally:
+            cursor.close()
+
+    return sqlite_engine
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -16,14 +69,20 @@ def get_db():
 
 def init_db():
     from . import models
+    from .schema import migrate
     Base.metadata.create_all(bind=engine)
-    _ensure_schema_compatibility()
-
-def _ensure_schema_compatibility():
-    inspector = inspect(engine)
-    table_names = set(inspector.get_table_names())
-    if "transactions" in table_names:
-        transaction_columns = {col["name"] for col in inspector.get_columns("transactions")}
-        if "usd_value" not in transaction_columns:
-            with engine.begin() as conn:
-                conn.execute(text("ALTER TABLE transactions ADD COLUMN usd_value FLOAT DEFAULT 0"))
+    return migrate()
+
+def get_meta(db, key, default=None):
+    from .models import AppMeta
+    row = db.get(AppMeta, key)
+    return row.value if row else default
+
+def set_meta(db, key, value):
+    # Caller commits
+    from .models import AppMeta
+    row = db.get(AppMeta, key)
+    if row is None:
+        db.add(AppMeta(key=key, value=str(value)))
+    else:
+        row.value = str(value)
@@ -0,0 +1,176 @@
+import csv
+import io
+import os
+from datetime import datetime, timezone
+from asgiref.sync import sync_to_async
+from sqlalchemy import select
+from .database import SessionLocal
+from .models import Transaction, User
+from .responses import json_body
+from .rollups import estimated_usd_expression
+
+# Full-ledger export for admins. Rows are read through a server-side cursor
+# in EXPORT_BATCH_SIZE partitions of plain column tuples (no ORM objects, no
+# identity map) and each partition is written out as one chunk, so memory
+# stays flat however many rows match.
+
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', '2000'))
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+EXPORT_FIELDS = (
+    'id', 'userId', 'userEmail', 'fromToken', 'toToken', 'fromAmount', 'toAmount',
+    'rate', 'fee', 'slippage', 'usdValue', 'status', 'createdAt',
+)
+# Spreadsheets evaluate text cells starting with these as formulas
+CSV_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class ExportFilterError(ValueError):
+    pass
+
+
+def parse_filters(params):
+    # ?since= and ?until= take an ISO date or datetime (until is exclusive);
+    # ?user= takes a user id or an email
+    filters = {}
+    for name in ('since', 'until'):
+        value = params.get(name)
+        if value:
+            filters[name] = _parse_moment(name, value)
+    if 'since' in filters and 'until' in filters and filters['since'] >= filters['until']:
+        raise ExportFilterError('since must be earlier than until')
+
+    user = (params.get('user') or '').strip()
+    if user.isdigit():
+        filters['user_id'] = int(user)
+    elif user:
+        filters['user_email'] = user.lower()
+    return filters
+
+
+def export_statement(filters):
+    usd_value = estimated_usd_expression()
+    stmt = select(
+        Transaction.id,
+        Transaction.user_id,
+        User.email,
+        Transaction.from_token_symbol,
+        Transaction.to_token_symbol,
+        Transaction.from_amount,
+        Transaction.to_amount,
+        Transaction.rate,
+        Transaction.fee,
+        Transaction.slippage,
+        usd_value,
+        Transaction.status,
+        Transaction.created_at,
+    ).join(User, User.id == Transaction.user_id)
+
+    if 'since' in filters:
+        stmt = stmt.where(Transaction.created_at >= filters['since'])
+    if 'until' in filters:
+        stmt = stmt.where(Transaction.created_at < filters['until'])
+    if 'user_id' in filters:
+        stmt = stmt.where(Transaction.user_id == filters['user_id'])
+    if 'user_email' in filters:
+        stmt = stmt.where(User.email == filters['user_email'])
+    # Walks ix_transactions_created / ix_transactions_user_created
+    return stmt.order_by(Transaction.created_at.asc(), Transaction.id.asc())
+
+
+def export_rows(filters):
+    # Yields lists of row tuples; the session lives exactly as long as the stream
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            export_statement(filters),
+            execution_options={'yield_per': EXPORT_BATCH_SIZE, 'stream_results': True}
+        )
+        for partition in result.partitions():
+            yield partition
+    finally:
+        db.close()
+
+
+def export_chunks(filters, fmt):
+    if fmt == 'csv':
+        return _csv_chunks(export_rows(filters))
+    return _ndjson_chunks(export_rows(filters))
+
+
+def as_async(chunks):
+    # Under ASGI, Django buffers a sync iterator in full before sending it.
+    # Pull one chunk at a time on the thread that opened the session instead.
+    async def stream():
+        try:
+            while True:
+                chunk = await sync_to_async(next, thread_sensitive=True)(chunks, None)
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            await sync_to_async(chunks.close, thread_sensitive=True)()
+
+    return stream()
+
+
+def _record(row):
+    tx_id, user_id, email, from_symbol, to_symbol, from_amount, to_amount, rate, fee, slippage, usd, status, created_at = row
+    return {
+        'id': tx_id,
+        'userId': user_id,
+        'userEmail': email,
+        'fromToken': from_symbol,
+        'toToken': to_symbol,
+        'fromAmount': from_amount,
+        'toAmount': to_amount,
+        'rate': rate,
+        'fee': fee,
+        'slippage': slippage,
+        'usdValue': round(float(usd or 0), 2),
+        'status': status.value if status is not None else None,
+        'createdAt': created_at,
+    }
+
+
+def _ndjson_chunks(partitions):
+    for rows in partitions:
+        yield b''.join(json_body(_record(row)) + b'\n' for row in rows)
+
+
+def _csv_chunks(partitions):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for rows in partitions:
+        for row in rows:
+            record = _record(row)
+            if record['createdAt'] is not None:
+                record['createdAt'] = record['createdAt'].isoformat()
+            writer.writerow([_csv_cell(record[field]) for field in EXPORT_FIELDS])
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    # Header only, when nothing matched
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def _csv_cell(value):
+    # Symbols come from upstream token metadata; numbers are written as-is
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _parse_moment(name, value):
+    try:
+        moment = datetime.fromisoformat(value.strip())
+    except ValueError:
+        raise ExportFilterError(f'{name} must be an ISO date or datetime')
+    # The ledger stores naive UTC
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
@@ -0,0 +1,304 @@
+import os
+import queue
+import random
+import threading
+import time
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError, OperationalError
+from .database import SessionLocal
+from .models import User, Wallet
+
+# Balance writes are single conditional UPDATEs, so a concurrent request can
+# never spend the same funds twice, and every unit of work is one short
+# transaction that is retried as a whole when the database reports a lock.
+# Every wallet write also bumps users.balance_version in the same
+# transaction; readers in any worker process compare it to decide whether a
+# cached balance body is still current.
+
+LEDGER_MAX_ATTEMPTS = int(os.environ.get('LEDGER_MAX_ATTEMPTS', '5'))
+LEDGER_RETRY_BASE_SECONDS = float(os.environ.get('LEDGER_RETRY_BASE_SECONDS', '0.02'))
+# Optional group commit: units of work from concurrent requests share one
+# transaction, committed every LEDGER_GROUP_WINDOW_MS or LEDGER_GROUP_MAX_SIZE units
+LEDGER_GROUP_COMMIT = os.environ.get('LEDGER_GROUP_COMMIT', '0') == '1'
+LEDGER_GROUP_WINDOW_MS = float(os.environ.get('LEDGER_GROUP_WINDOW_MS', '2'))
+LEDGER_GROUP_MAX_SIZE = int(os.environ.get('LEDGER_GROUP_MAX_SIZE', '64'))
+
+# Driver messages meaning "another writer holds the lock, try again"
+_LOCK_ERRORS = (
+    'database is locked',
+    'database table is locked',
+    'deadlock detected',
+    'could not serialize access',
+    'lock timeout',
+)
+
+
+class InsufficientBalance(Exception):
+    pass
+
+
+class LedgerBusy(Exception):
+    #Raised when a unit of work still hits lock contention after every retry
+    pass
+
+
+def run_atomic(work):
+    # Runs work(db) and commits. Lock errors roll back and re-run work with
+    # jittered exponential backoff; anything else rolls back and propagates.
+    # Either way the caller only gets a result once it is committed.
+    if LEDGER_GROUP_COMMIT:
+        return group_committer.submit(work)
+    for attempt in range(1, LEDGER_MAX_ATTEMPTS + 1):
+        db = SessionLocal()
+        try:
+            result = work(db)
+            db.commit()
+            return result
+        except OperationalError as e:
+            db.rollback()
+            if not _is_lock_error(e):
+                raise
+            if attempt == LEDGER_MAX_ATTEMPTS:
+                raise LedgerBusy('Wallet is busy, please retry') from e
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        time.sleep(LEDGER_RETRY_BASE_SECONDS * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+
+
+class _PendingWork:
+    def __init__(self, work):
+        self.work = work
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+    def finish(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.done.set()
+
+
+class GroupCommitter:
+    #Single writer thread that runs queued units of work in one transaction
+    #and commits them together, so N requests cost one commit (one fsync)
+
+    def __init__(self, window_seconds, max_size):
+        self.window_seconds = window_seconds
+        self.max_size = max(1, max_size)
+        self._queue = queue.Queue()
+        self._started = False
+        self._start_lock = threading.Lock()
+        self.groups = 0
+        self.units = 0
+
+    def submit(self, work):
+        # Blocks until the group holding this unit has committed
+        self._ensure_started()
+        pending = _PendingWork(work)
+        self._queue.put(pending)
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def stats(self):
+        return {
+            'groups': self.groups,
+            'units': self.units,
+            'avgGroupSize': round(self.units / self.groups, 2) if self.groups else 0.0,
+        }
+
+    def _ensure_started(self):
+        if self._started:
+            return
+        with self._start_lock:
+            if self._started:
+                return
+            self._started = True
+            threading.Thread(target=self._run, name='ledger-group-commit', daemon=True).start()
+
+    def _run(self):
+        while True:
+            group = [self._queue.get()]
+            deadline = time.monotonic() + self.window_seconds
+            while len(group) < self.max_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    group.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            try:
+                self._commit_group(group)
+            except Exception as e:
+                for pending in group:
+                    if not pending.done.is_set():
+                        pending.finish(error=e)
+
+    def _commit_group(self, group):
+        for attempt in range(1, LEDGER_MAX_ATTEMPTS + 1):
+            db = SessionLocal()
+            try:
+                results = self._apply(db, group)
+                db.commit()
+            except OperationalError as e:
+                db.rollback()
+                if not _is_lock_error(e):
+                    raise
+                if attempt == LEDGER_MAX_ATTEMPTS:
+                    raise LedgerBusy('Wallet is busy, please retry') from e
+                results = None
+            finally:
+                db.close()
+            if results is not None:
+                self.groups += 1
+                self.units += len(results)
+                for pending, result in results:
+                    pending.finish(result=result)
+                return
+            time.sleep(LEDGER_RETRY_BASE_SECONDS * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+
+    def _apply(self, db, group):
+        # A unit that raises (e.g. InsufficientBalance) fails alone: the
+        # group is rolled back and replayed without it, because SAVEPOINTs
+        # are unreliable on pysqlite's default transaction handling.
+        while True:
+            results = []
+            failed = None
+            for pending in group:
+                if pending.done.is_set():
+                    continue
+                try:
+                    results.append((pending, pending.work(db)))
+                except OperationalError:
+                    raise
+                except Exception as e:
+                    failed = (pending, e)
+                    break
+            if failed is None:
+                return results
+            db.rollback()
+            pending, error = failed
+            pending.finish(error=error)
+
+
+group_committer = GroupCommitter(LEDGER_GROUP_WINDOW_MS / 1000, LEDGER_GROUP_MAX_SIZE)
+
+
+def debit(db, user_id, token_mint, amount):
+    # Returns (symbol, new balance); raises InsufficientBalance when the
+    # wallet is missing or holds less than amount at the moment of the write
+    row = _apply_delta(db, user_id, token_mint, -amount, Wallet.balance >= amount)
+    if row is None:
+        raise InsufficientBalance('Insufficient balance')
+    return row
+
+
+def credit(db, user_id, token_mint, amount, token=None):
+    # Returns (symbol, new balance). A missing wallet is created from `token`
+    # (COMMON_TOKENS-shaped dict); without one, returns None.
+    row = _apply_delta(db, user_id, token_mint, amount)
+    if row is None and token is not None:
+        ensure_wallet(db, user_id, token)
+        row = _apply_delta(db, user_id, token_mint, amount)
+    return row
+
+
+def top_up(db, user_id, token_mint, target):
+    # Raises the balance to target when it is lower; never lowers it.
+    # Returns (symbol, new balance), or None when nothing changed.
+    return _assign(db, user_id, token_mint, target, Wallet.balance < target)
+
+
+def set_balance(db, user_id, token_mint, amount):
+    # Overwrites the balance (admin wallets); None when it already matched
+    return _assign(db, user_id, token_mint, amount, Wallet.balance != amount)
+
+
+def wallet_exists(db, user_id, token_mint):
+    return db.execute(
+        select(Wallet.id).where(Wallet.user_id == user_id, Wallet.token_mint == token_mint)
+    ).first() is not None
+
+
+def ensure_wallet(db, user_id, token):
+    # Insert-if-missing on the (user_id, token_mint) unique index, so two
+    # requests creating the same wallet cannot produce duplicate rows
+    values = {
+        'user_id': user_id,
+        'token_mint': token['mint'],
+        'token_symbol': token.get('symbol', 'UNKNOWN'),
+        'token_name': token.get('name', 'Unknown Token'),
+        'token_icon': token.get('icon', ''),
+        'token_decimals': token.get('decimals', 9),
+        'balance': 0.0,
+    }
+    dialect = db.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        dialect_insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        result = db.execute(dialect_insert(Wallet).values(**values).on_conflict_do_nothing(
+            index_elements=['user_id', 'token_mint']
+        ))
+        if result.rowcount:
+            bump_balance_version(db, user_id)
+        return
+
+    try:
+        with db.begin_nested():
+            db.execute(insert(Wallet).values(**values))
+    except IntegrityError:
+        return
+    bump_balance_version(db, user_id)
+
+
+def bump_balance_version(db, user_id):
+    # Inside the caller's transaction, so the new version commits (or rolls
+    # back) together with the wallet change it announces
+    db.execute(
+        update(User).where(User.id == user_id).values(balance_version=User.balance_version + 1),
+        execution_options={'synchronize_session': False}
+    )
+
+
+def balance_version(db, user_id):
+    return db.execute(select(User.balance_version).where(User.id == user_id)).scalar()
+
+
+def _apply_delta(db, user_id, token_mint, delta, *conditions):
+    row = db.execute(
+        update(Wallet).where(
+            Wallet.user_id == user_id,
+            Wallet.token_mint == token_mint,
+            *conditions
+        ).values(balance=Wallet.balance + delta).returning(Wallet.token_symbol, Wallet.balance),
+        execution_options={'synchronize_session': False}
+    ).first()
+    if row is not None:
+        bump_balance_version(db, user_id)
+    return row
+
+
+def _assign(db, user_id, token_mint, amount, condition):
+    # Conditional UPDATE, so a concurrent debit/credit is never overwritten
+    # with a balance read earlier
+    row = db.execute(
+        update(Wallet).where(
+            Wallet.user_id == user_id,
+            Wallet.token_mint == token_mint,
+            condition
+        ).values(balance=amount).returning(Wallet.token_symbol, Wallet.balance),
+        execution_options={'synchronize_session': False}
+    ).first()
+    if row is not None:
+        bump_balance_version(db, user_id)
+    return row
+
+
+def _is_lock_error(exc):
+    message = str(getattr(exc, 'orig', exc)).lower()
+    return any(fragment in message for fragment in _LOCK_ERRORS)
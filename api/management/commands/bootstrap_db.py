@@ -0,0 +1,31 @@
+import time
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Create or upgrade the database schema and seed demo data (safe to re-run)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--no-demo-data',
+            action='store_true',
+            help='Only create/upgrade tables, skip demo users, balances and news'
+        )
+        parser.add_argument(
+            '--rebuild-rollups',
+            action='store_true',
+            help='Recompute the hourly transaction rollups from the full ledger'
+        )
+
+    def handle(self, *args, **options):
+        from api.views import bootstrap_database
+
+        started = time.perf_counter()
+        applied = bootstrap_database(
+            seed_demo_data=not options['no_demo_data'],
+            rebuild_rollups=options['rebuild_rollups']
+        )
+        elapsed = time.perf_counter() - started
+        for name in applied:
+            self.stdout.write(f'  applied schema step: {name}')
+        self.stdout.write(self.style.SUCCESS(f'Database ready in {elapsed:.2f}s'))
@@ -0,0 +1,179 @@
+import random
+import time
+from datetime import datetime, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from sqlalchemy import func, insert, select
+from api.auth import hash_password
+from api.database import SessionLocal, engine, init_db
+from api.models import User, Wallet, Transaction, TransactionStatus, COMMON_TOKENS
+from api.oracle import TOKEN_PRICE_USD
+from api.rollups import rebuild_rollups
+from api.views import STARTER_BALANCES, random_swap_amounts
+
+
+class Command(BaseCommand):
+    help = 'Bulk-insert synthetic users, wallets and transactions for load and capacity testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--tx-per-user', type=int, default=20,
+                            help='Average transactions per user (actual count is 0..2x this)')
+        parser.add_argument('--days', type=int, default=365,
+                            help='Spread of created_at values back from now')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--deposit-ratio', type=float, default=0.1,
+                            help='Share of transactions recorded as deposits instead of swaps')
+        parser.add_argument('--email-prefix', default='load')
+        parser.add_argument('--password', default='student123')
+
+    def handle(self, *args, **options):
+        users_total = options['users']
+        batch_size = max(100, options['batch_size'])
+        prefix = options['email_prefix']
+        randomizer = random.Random(options['seed'])
+        now = datetime.utcnow()
+        span_seconds = max(1, options['days']) * 24 * 3600
+
+        init_db()
+        users_table = User.__table__
+        with engine.connect() as conn:
+            existing = conn.execute(
+                select(func.count()).select_from(users_table).where(users_table.c.email.like(f'{prefix}%@load.local'))
+            ).scalar()
+        if existing:
+            raise CommandError(f'{existing} users with prefix "{prefix}" already exist, pass another --email-prefix')
+
+        # One bcrypt hash shared by every generated user
+        password_hash = hash_password(options['password'])
+        counts = {'users': 0, 'wallets': 0, 'transactions': 0}
+        started = time.perf_counter()
+        transactions = []
+
+        for batch_start in range(0, users_total, batch_size):
+            batch_end = min(batch_start + batch_size, users_total)
+            user_rows = [
+                {
+                    'email': f'{prefix}{idx:07d}@load.local',
+                    'password_hash': password_hash,
+                    'created_at': now - timedelta(seconds=randomizer.uniform(0, span_seconds)),
+                }
+                for idx in range(batch_start, batch_end)
+            ]
+
+            with engine.begin() as conn:
+                inserted = conn.execute(
+                    insert(users_table).returning(users_table.c.id, sort_by_parameter_order=True),
+                    user_rows
+                ).all()
+
+                wallet_rows = []
+                for (user_id,), user_row in zip(inserted, user_rows):
+                    for token in COMMON_TOKENS:
+                        starter = STARTER_BALANCES.get(token['symbol'], 10.0)
+                        wallet_rows.append({
+                            'user_id': user_id,
+                            'token_mint': token['mint'],
+                            'token_symbol': token['symbol'],
+                            'token_name': token['name'],
+                            'token_icon': token['icon'],
+                            'token_decimals': token['decimals'],
+                            'balance': round(starter * randomizer.uniform(0.5, 20), 6),
+                        })
+                    transactions.extend(_transactions_for(randomizer, user_id, user_row['created_at'], now, options))
+                conn.execute(insert(Wallet.__table__), wallet_rows)
+
+            counts['users'] += len(user_rows)
+            counts['wallets'] += len(wallet_rows)
+
+            while len(transactions) >= batch_size:
+                _insert_transactions(transactions[:batch_size])
+                counts['transactions'] += batch_size
+                transactions = transactions[batch_size:]
+            self._progress(counts, started)
+
+        if transactions:
+            _insert_transactions(transactions)
+            counts['transactions'] += len(transactions)
+
+        elapsed = time.perf_counter() - started
+        total_rows = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Inserted {counts['users']} users, {counts['wallets']} wallets, "
+            f"{counts['transactions']} transactions in {elapsed:.1f}s "
+            f"({total_rows / elapsed:,.0f} rows/s)"
+        ))
+
+        # Bulk inserts bypass the incremental rollup path
+        db = SessionLocal()
+        try:
+            buckets = rebuild_rollups(db)
+        finally:
+            db.close()
+        self.stdout.write(f'  rebuilt {buckets} hourly rollup buckets')
+
+    def _progress(self, counts, started):
+        elapsed = time.perf_counter() - started
+        total_rows = sum(counts.values())
+        self.stdout.write(
+            f"  users={counts['users']} wallets={counts['wallets']} "
+            f"transactions={counts['transactions']} ({total_rows / elapsed:,.0f} rows/s)"
+        )
+
+
+def _static_price(symbol):
+    # Fixed seed prices keep generated USD values reproducible for a given --seed
+    return TOKEN_PRICE_USD.get(symbol, 1.0)
+
+
+def _transactions_for(randomizer, user_id, user_created_at, now, options):
+    rows = []
+    lifetime = max(1.0, (now - user_created_at).total_seconds())
+    for _ in range(randomizer.randint(0, 2 * options['tx_per_user'])):
+        # sqrt skews activity towards recent dates, like a growing user base
+        created_at = user_created_at + timedelta(seconds=lifetime * randomizer.random() ** 0.5)
+        if randomizer.random() < options['deposit_ratio']:
+            token = randomizer.choice(COMMON_TOKENS)
+            amount, _, usd_value = random_swap_amounts(randomizer, token['symbol'], token['symbol'], _static_price)
+            rows.append({
+                'user_id': user_id,
+                'from_token_mint': 'cash',
+                'from_token_symbol': 'DEPOSIT',
+                'from_amount': amount,
+                'to_token_mint': token['mint'],
+                'to_token_symbol': token['symbol'],
+                'to_amount': amount,
+                'rate': 1.0,
+                'fee': 0.0,
+                'slippage': 0.0,
+                'usd_value': usd_value,
+                'status': TransactionStatus.COMPLETED,
+                'created_at': created_at,
+            })
+            continue
+
+        from_token, to_token = randomizer.sample(COMMON_TOKENS, 2)
+        from_amount, to_amount, usd_value = random_swap_amounts(
+            randomizer, from_token['symbol'], to_token['symbol'], _static_price
+        )
+        rows.append({
+            'user_id': user_id,
+            'from_token_mint': from_token['mint'],
+            'from_token_symbol': from_token['symbol'],
+            'from_amount': from_amount,
+            'to_token_mint': to_token['mint'],
+            'to_token_symbol': to_token['symbol'],
+            'to_amount': to_amount,
+            'rate': (to_amount / from_amount) if from_amount else 0,
+            'fee': 0.3,
+            'slippage': 0.5,
+            'usd_value': usd_value,
+            'status': TransactionStatus.COMPLETED,
+            'created_at': created_at,
+        })
+    return rows
+
+
+def _insert_transactions(rows):
+    with engine.begin() as conn:
+        conn.execute(insert(Transaction.__table__), rows)
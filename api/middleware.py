@@ -0,0 +1,124 @@
+import os
+import zlib
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Negotiated response compression: brotli when the client accepts it and the
+# package is installed, gzip otherwise. Bodies under COMPRESS_MIN_BYTES go out
+# as-is, since headers and CPU cost more than the bytes saved.
+
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', '1024'))
+COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', '6'))
+COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', '5'))
+COMPRESSIBLE_TYPES = (
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'image/svg+xml',
+    'text/',
+)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    #gzip/brotli for API and page responses, including streamed ones
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or not _compressible(response):
+            return response
+        # The body depends on Accept-Encoding even when this one goes out plain
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        encoding = negotiate_encoding(request.headers.get('Accept-Encoding', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = _acompress_stream(response.streaming_content, encoding)
+            else:
+                response.streaming_content = _compress_stream(response.streaming_content, encoding)
+            if response.has_header('Content-Length'):
+                del response.headers['Content-Length']
+        else:
+            if len(response.content) < COMPRESS_MIN_BYTES:
+                return response
+            process, _, finish = _compressor(encoding)
+            compressed = process(response.content) + finish()
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # Same entity, different bytes: the validator can only stay weak
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+
+def negotiate_encoding(header):
+    # Returns 'br', 'gzip' or None. Honours q=0 and the '*' wildcard.
+    accepted = {}
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name] = quality
+
+    wildcard = accepted.get('*', 0.0)
+    candidates = ('br', 'gzip') if brotli is not None else ('gzip',)
+    for encoding in candidates:
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+def _compressible(response):
+    if response.status_code != 200:
+        return False
+    content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def _compressor(encoding):
+    # (process, flush, finish) over one compression stream
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=COMPRESS_BROTLI_QUALITY)
+        return compressor.process, compressor.flush, compressor.finish
+    # wbits=31 writes the gzip header and trailer
+    compressor = zlib.compressobj(COMPRESS_GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+
+def _compress_stream(chunks, encoding):
+    # Flushed per chunk so a streamed export reaches the client as it is produced
+    process, flush, finish = _compressor(encoding)
+    for chunk in chunks:
+        data = process(chunk) + flush()
+        if data:
+            yield data
+    yield finish()
+
+
+async def _acompress_stream(chunks, encoding):
+    process, flush, finish = _compressor(encoding)
+    async for chunk in chunks:
+        data = process(chunk) + flush()
+        if data:
+            yield data
+    yield finish()
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Enum as SQLEnum, Text
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, ForeignKey, Enum as SQLEnum, Text, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 import enum
 from .database import Base
@@ -15,6 +15,8 @@ class User(Base):
     email = Column(String(255), unique=True, index=True, nullable=False)
     password_hash = Column(String(255), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Bumped in the same transaction as every wallet write (api/ledger.py)
+    balance_version = Column(Integer, nullable=False, default=0, server_default="0")
     wallets = relationship("Wallet", back_populates="user", cascade="all, delete-orphan")
     transactions = relationship("Transaction", back_populates="user", cascade="all, delete-orphan")
 
@@ -29,6 +31,10 @@ class Wallet(Base):
     token_decimals = Column(Integer, default=9)
     balance = Column(Float, default=0.0)
     user = relationship("User", back_populates="wallets")
+    # Kept in sync with api/schema.py, which creates them on existing databases
+    __table_args__ = (
+        Index("uq_wallets_user_mint", "user_id", "token_mint", unique=True),
+    )
 
 class Transaction(Base):
     __tablename__ = "transactions"
@@ -47,6 +53,10 @@ class Transaction(Base):
     status = Column(SQLEnum(TransactionStatus), default=TransactionStatus.COMPLETED)
     created_at = Column(DateTime, default=datetime.utcnow)
     user = relationship("User", back_populates="transactions")
+    __table_args__ = (
+        Index("ix_transactions_user_created", "user_id", "created_at", "id"),
+        Index("ix_transactions_created", "created_at", "id"),
+    )
 
     def to_dict(self):
         return {
@@ -60,9 +70,16 @@ class Transaction(Base):
             "slippage": self.slippage,
             "usdValue": self.usd_value or 0.0,
             "status": self.status.value,
-            "createdAt": self.created_at.isoformat() if self.created_at else None
+            "createdAt": self.created_at
         }
 
+class TransactionRollup(Base):
+    __tablename__ = "transaction_rollups_hourly"
+    bucket_start = Column(DateTime, primary_key=True)
+    token_symbol = Column(String(20), primary_key=True)
+    tx_count = Column(Integer, nullable=False, default=0)
+    usd_volume = Column(Float, nullable=False, default=0.0)
+
 class NewsPost(Base):
     __tablename__ = "news_posts"
     id = Column(Integer, primary_key=True, index=True)
@@ -79,10 +96,27 @@ class NewsPost(Base):
             "summary": self.summary,
             "category": self.category or "General",
             "authorEmail": self.author_email or "",
-            "date": self.created_at.date().isoformat() if self.created_at else "",
-            "createdAt": self.created_at.isoformat() if self.created_at else None,
+            "date": self.created_at.date() if self.created_at else "",
+            "createdAt": self.created_at,
         }
 
+class AppMeta(Base):
+    __tablename__ = "app_meta"
+    key = Column(String(64), primary_key=True)
+    value = Column(String(255), nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class PricePoint(Base):
+    __tablename__ = "price_points"
+    id = Column(Integer, primary_key=True, index=True)
+    symbol = Column(String(20), nullable=False)
+    resolution = Column(String(10), nullable=False)
+    ts = Column(BigInteger, nullable=False)  # unix milliseconds, as returned by CoinGecko
+    price = Column(Float, nullable=False)
+    __table_args__ = (
+        UniqueConstraint("symbol", "resolution", "ts", name="uq_price_points_series_ts"),
+    )
+
 COMMON_TOKENS = [
     {
         "mint": "So11111111111111111111111111111111111111112",
@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import case, func
+from .price_history import COINGECKO_IDS
+from .upstream import coingecko
+
+PRICE_REFRESH_SECONDS = float(os.environ.get('PRICE_REFRESH_SECONDS', '60'))
+PRICE_STALE_SECONDS = float(os.environ.get('PRICE_STALE_SECONDS', '300'))
+
+# Seed prices, served (flagged stale) until the first refresh succeeds
+TOKEN_PRICE_USD = {
+    'SOL': 98.0,
+    'USDC': 1.0,
+    'USDT': 1.0,
+    'BONK': 0.000025,
+    'JUP': 0.85,
+}
+
+
+class PriceOracle:
+    #In-memory USD prices. The refresher thread builds a new snapshot dict and
+    #swaps the reference, so readers never take a lock.
+
+    def __init__(self, coingecko_ids, seed_prices, refresh_seconds=PRICE_REFRESH_SECONDS,
+                 stale_seconds=PRICE_STALE_SECONDS):
+        self.coingecko_ids = dict(coingecko_ids)
+        self.refresh_seconds = refresh_seconds
+        self.stale_seconds = stale_seconds
+        # symbol -> (usd, updated_at unix seconds or None for seed values)
+        self._snapshot = {symbol: (price, None) for symbol, price in seed_prices.items()}
+        self._started = False
+        self._start_lock = threading.Lock()
+        self.last_error = None
+
+    def price(self, symbol, default=1.0):
+        self._ensure_started()
+        entry = self._snapshot.get((symbol or '').upper())
+        return entry[0] if entry else default
+
+    def quote(self, symbol):
+        self._ensure_started()
+        symbol = (symbol or '').upper()
+        entry = self._snapshot.get(symbol)
+        if entry is None:
+            return None
+        usd, updated_at = entry
+        return {
+            'symbol': symbol,
+            'usd': usd,
+            'updatedAt': datetime.utcfromtimestamp(updated_at) if updated_at else None,
+            'stale': updated_at is None or time.time() - updated_at > self.stale_seconds,
+        }
+
+    def snapshot(self):
+        self._ensure_started()
+        return {symbol: entry[0] for symbol, entry in self._snapshot.items()}
+
+    def sql_price(self, symbol_column, default=1.0):
+        # CASE expression with the current snapshot, for USD math inside SQL
+        prices = self.snapshot()
+        return case(prices, value=func.upper(symbol_column), else_=default)
+
+    def symbols(self):
+        return list(self._snapshot)
+
+    def refresh(self):
+        # One batched CoinGecko call for every tracked token
+        ids = {coingecko_id: symbol for symbol, coingecko_id in self.coingecko_ids.items()}
+        response = coingecko.get(
+            '/simple/price',
+            endpoint='simple_price',
+            params={'ids': ','.join(ids), 'vs_currencies': 'usd'}
+        )
+        response.raise_for_status()
+        data = response.json()
+        now = time.time()
+        snapshot = dict(self._snapshot)
+        for coingecko_id, symbol in ids.items():
+            usd = (data.get(coingecko_id) or {}).get('usd')
+            if usd is not None:
+                snapshot[symbol] = (float(usd), now)
+        self._snapshot = snapshot
+
+    def _ensure_started(self):
+        if self._started or self.refresh_seconds <= 0:
+            return
+        with self._start_lock:
+            if self._started:
+                return
+            self._started = True
+            threading.Thread(target=self._run, name='price-oracle', daemon=True).start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+                self.last_error = None
+            except Exception as e:
+                # Keep serving the previous snapshot; readers see it as stale
+                self.last_error = str(e)
+            time.sleep(self.refresh_seconds)
+
+
+price_oracle = PriceOracle(COINGECKO_IDS, TOKEN_PRICE_USD)
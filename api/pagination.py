@@ -0,0 +1,48 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+# Opaque keyset cursors over (created_at, id). Clients pass them back verbatim.
+
+
+def encode_cursor(created_at, row_id):
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError, binascii.Error, UnicodeError):
+        raise ValueError('Invalid cursor')
+
+
+def after_cursor(created_at_column, id_column, cursor):
+    # Rows strictly after the cursor in (created_at ASC, id ASC) order
+    created_at, row_id = cursor
+    return or_(
+        created_at_column > created_at,
+        and_(created_at_column == created_at, id_column > row_id)
+    )
+
+
+def before_cursor(created_at_column, id_column, cursor):
+    # Rows strictly before the cursor in (created_at DESC, id DESC) order
+    created_at, row_id = cursor
+    return or_(
+        created_at_column < created_at,
+        and_(created_at_column == created_at, id_column < row_id)
+    )
+
+
+def next_cursor(rows, limit, key):
+    # rows were fetched with LIMIT limit + 1; returns (page, cursor or None)
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    created_at, row_id = key(page[-1])
+    return page, encode_cursor(created_at, row_id)
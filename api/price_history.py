@@ -0,0 +1,238 @@
+import threading
+import time
+from sqlalchemy import func, insert
+from sqlalchemy.exc import IntegrityError
+from .database import SessionLocal
+from .models import PricePoint
+from .upstream import coingecko
+
+COINGECKO_IDS = {
+    'SOL': 'solana',
+    'USDC': 'usd-coin',
+    'USDT': 'tether',
+    'BONK': 'bonk',
+    'JUP': 'jupiter-exchange-solana'
+}
+DEFAULT_SYMBOL = 'SOL'
+MAX_DAYS = 365
+MIN_CHART_POINTS = 3
+MAX_CHART_POINTS = 2000
+DAY_MS = 24 * 60 * 60 * 1000
+
+# (name, largest "days" window served, spacing between stored points in ms).
+# Matches CoinGecko's own granularity: 5-minute for 1 day, hourly up to 90 days, daily beyond.
+RESOLUTIONS = (
+    ('5m', 1, 5 * 60 * 1000),
+    ('hourly', 90, 60 * 60 * 1000),
+    ('daily', MAX_DAYS, DAY_MS),
+)
+
+_locks_guard = threading.Lock()
+_series_locks = {}
+# Earliest window start already requested from CoinGecko per series, so a
+# token with a shorter history than the window isn't re-fetched every time
+_backfilled_from = {}
+
+
+def parse_days(value):
+    if str(value).lower() == 'max':
+        return MAX_DAYS
+    try:
+        days = int(value)
+    except (TypeError, ValueError):
+        return 1
+    return max(1, min(days, MAX_DAYS))
+
+
+def parse_points(value):
+    # Target resolution for downsampling; None keeps every stored point
+    if value in (None, ''):
+        return None
+    try:
+        points = int(value)
+    except (TypeError, ValueError):
+        return None
+    return max(MIN_CHART_POINTS, min(points, MAX_CHART_POINTS))
+
+
+def downsample_lttb(points, threshold):
+    # Largest-Triangle-Three-Buckets: keeps first/last points and, per bucket,
+    # the point forming the largest triangle with its neighbours, so peaks and
+    # troughs survive while the payload size stays fixed.
+    n = len(points)
+    if threshold is None or threshold >= n or threshold < MIN_CHART_POINTS:
+        return points
+
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    sampled = [points[0]]
+    bucket_size = (n - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        next_start = end
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        if next_start >= next_end:
+            next_start, next_end = n - 1, n
+        count = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / count
+        avg_y = sum(ys[next_start:next_end]) / count
+
+        ax, ay = xs[a], ys[a]
+        dx, dy = avg_x - ax, avg_y - ay
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs(dx * (ys[j] - ay) - (xs[j] - ax) * dy)
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        a = best
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def resolution_for(days):
+    for name, max_days, step in RESOLUTIONS:
+        if days <= max_days:
+            return name, max_days, step
+    return RESOLUTIONS[-1]
+
+
+def load_price_history(token, days):
+    # Returns [[timestamp_ms, price], ...] for the last `days` days from the
+    # local store. CoinGecko is only called inline when the window isn't
+    # covered yet; a stale tail is refreshed in the background.
+    symbol = token.upper() if token.upper() in COINGECKO_IDS else DEFAULT_SYMBOL
+    resolution, max_days, step = resolution_for(days)
+    now_ms = int(time.time() * 1000)
+    start_ms = now_ms - days * DAY_MS
+
+    db = SessionLocal()
+    try:
+        first_ts, last_ts = _series_bounds(db, symbol, resolution)
+        covered = first_ts is not None and (
+            first_ts <= start_ms + step
+            or _backfilled_from.get((symbol, resolution), now_ms) <= start_ms + step
+        )
+        sync_error = None
+        if not covered:
+            try:
+                sync_series(db, symbol, resolution, start_ms)
+            except Exception as e:
+                db.rollback()
+                sync_error = e
+        elif now_ms - last_ts >= step:
+            _sync_in_background(symbol, resolution, start_ms)
+
+        rows = db.query(PricePoint.ts, PricePoint.price).filter(
+            PricePoint.symbol == symbol,
+            PricePoint.resolution == resolution,
+            PricePoint.ts >= start_ms
+        ).order_by(PricePoint.ts.asc()).all()
+        if not rows and sync_error is not None:
+            raise sync_error
+        return [[ts, price] for ts, price in rows]
+    finally:
+        db.close()
+
+
+def sync_series(db, symbol, resolution, start_ms):
+    # Fetches only what is missing: the head before the oldest stored point
+    # (when a longer window is requested) and the tail since the newest one.
+    _, max_days, step = next(r for r in RESOLUTIONS if r[0] == resolution)
+    with _series_lock(symbol, resolution):
+        now_ms = int(time.time() * 1000)
+        first_ts, last_ts = _series_bounds(db, symbol, resolution)
+        # (fetch from, fetch to, keep points after, keep points before)
+        if first_ts is None:
+            ranges = [(start_ms, now_ms, None, None)]
+        else:
+            ranges = []
+            if start_ms < first_ts - step:
+                ranges.append((start_ms, first_ts, None, first_ts))
+            if now_ms - last_ts >= step:
+                ranges.append((last_ts, now_ms, last_ts, None))
+
+        for begin_ms, end_ms, after_ts, before_ts in ranges:
+            points = _fetch_range(COINGECKO_IDS[symbol], begin_ms, end_ms)
+            if after_ts is None:
+                key = (symbol, resolution)
+                _backfilled_from[key] = min(begin_ms, _backfilled_from.get(key, begin_ms))
+            rows = _thin(points, step, after_ts, before_ts)
+            if rows:
+                db.execute(insert(PricePoint), [
+                    {'symbol': symbol, 'resolution': resolution, 'ts': ts, 'price': price}
+                    for ts, price in rows
+                ])
+
+        db.query(PricePoint).filter(
+            PricePoint.symbol == symbol,
+            PricePoint.resolution == resolution,
+            PricePoint.ts < now_ms - (max_days + 1) * DAY_MS
+        ).delete(synchronize_session=False)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another worker stored the same points first
+            db.rollback()
+
+
+def _fetch_range(coingecko_id, begin_ms, end_ms):
+    response = coingecko.get(
+        f'/coins/{coingecko_id}/market_chart/range',
+        endpoint='market_chart',
+        params={
+            'vs_currency': 'usd',
+            'from': begin_ms // 1000,
+            'to': end_ms // 1000
+        }
+    )
+    response.raise_for_status()
+    return response.json().get('prices', [])
+
+
+def _thin(points, step, after_ts=None, before_ts=None):
+    # Keeps one point per `step` so mixed-granularity fetches stay uniform
+    kept = []
+    last = after_ts
+    min_gap = step * 0.9
+    for ts, price in sorted(points):
+        ts = int(ts)
+        if price is None or (before_ts is not None and ts > before_ts - min_gap):
+            continue
+        if last is not None and ts - last < min_gap:
+            continue
+        kept.append((ts, float(price)))
+        last = ts
+    return kept
+
+
+def _series_bounds(db, symbol, resolution):
+    return db.query(func.min(PricePoint.ts), func.max(PricePoint.ts)).filter(
+        PricePoint.symbol == symbol,
+        PricePoint.resolution == resolution
+    ).one()
+
+
+def _series_lock(symbol, resolution):
+    with _locks_guard:
+        return _series_locks.setdefault((symbol, resolution), threading.Lock())
+
+
+def _sync_in_background(symbol, resolution, start_ms):
+    if _series_lock(symbol, resolution).locked():
+        return
+
+    def run():
+        db = SessionLocal()
+        try:
+            sync_series(db, symbol, resolution, start_ms)
+        except Exception:
+            db.rollback()
+        finally:
+            db.close()
+
+    threading.Thread(target=run, daemon=True).start()
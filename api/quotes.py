@@ -0,0 +1,58 @@
+import math
+from .models import COMMON_TOKENS
+from .oracle import price_oracle
+
+# Local quotes for COMMON_TOKENS pairs, priced from the oracle's in-memory
+# snapshot. Amounts are in UI units (not lamports), like SwapView's payload.
+
+SWAP_FEE_BPS = 30  # 0.3%
+MAX_SLIPPAGE_PERCENT = 50.0
+LOCAL_TOKENS = {token['mint']: token for token in COMMON_TOKENS}
+
+
+class QuoteError(ValueError):
+    pass
+
+
+def supports_pair(input_mint, output_mint):
+    return input_mint in LOCAL_TOKENS and output_mint in LOCAL_TOKENS and input_mint != output_mint
+
+
+def quote(input_mint, output_mint, input_amount, slippage=0.5):
+    # Returns None for pairs priced elsewhere (Jupiter); raises QuoteError
+    # for bad amounts or slippage on a supported pair
+    if not supports_pair(input_mint, output_mint):
+        return None
+    # NaN/Infinity parse as floats and would propagate into every field
+    if not math.isfinite(input_amount) or input_amount <= 0:
+        raise QuoteError('Amount must be a positive number')
+    if not 0 <= slippage <= MAX_SLIPPAGE_PERCENT:
+        raise QuoteError(f'Slippage must be between 0 and {MAX_SLIPPAGE_PERCENT:g}%')
+
+    source = LOCAL_TOKENS[input_mint]
+    dest = LOCAL_TOKENS[output_mint]
+    source_price = price_oracle.quote(source['symbol'])
+    dest_price = price_oracle.quote(dest['symbol'])
+    if source_price is None or dest_price is None or dest_price['usd'] <= 0:
+        return None
+
+    in_usd = input_amount * source_price['usd']
+    gross_out = in_usd / dest_price['usd']
+    fee_amount = gross_out * SWAP_FEE_BPS / 10000
+    out_amount = gross_out - fee_amount
+    return {
+        'inputMint': input_mint,
+        'outputMint': output_mint,
+        'inputSymbol': source['symbol'],
+        'outputSymbol': dest['symbol'],
+        'inAmount': input_amount,
+        'outAmount': out_amount,
+        'minOutAmount': out_amount * (1 - slippage / 100),
+        'rate': out_amount / input_amount,
+        'feeBps': SWAP_FEE_BPS,
+        'feeAmount': fee_amount,
+        'slippage': slippage,
+        'inUsdValue': in_usd,
+        'outUsdValue': out_amount * dest_price['usd'],
+        'priceStale': source_price['stale'] or dest_price['stale'],
+    }
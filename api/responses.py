@@ -0,0 +1,96 @@
+import calendar
+import enum
+import hashlib
+import json
+import uuid
+from datetime import date, datetime, time
+from decimal import Decimal
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_http_date_safe
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# JSON for every API response: compact, UTF-8, datetimes as ISO 8601 without
+# a per-field isoformat() in to_dict(). orjson is used when installed; the
+# stdlib fallback produces the same output. Endpoints that pre-serialize their
+# payload once keep the bytes in a cache and answer conditional requests
+# without touching them.
+
+
+def _default(value):
+    # Types neither encoder knows; orjson only calls this for Decimal and
+    # anything exotic, the stdlib encoder for datetimes and enums as well
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def json_body(payload):
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            # e.g. integers wider than 64 bits in a proxied upstream payload
+            pass
+    return json.dumps(payload, default=_default, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+class JsonResponse(HttpResponse):
+    #Drop-in for django.http.JsonResponse that encodes through json_body
+
+    def __init__(self, data, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError('In order to allow non-dict objects to be serialized set the safe parameter to False.')
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=json_body(data), **kwargs)
+
+
+def etag_for(body):
+    # Strong validator derived from the exact bytes served
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(request, etag):
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    candidates = {tag.strip().removeprefix('W/') for tag in header.split(',')}
+    return etag in candidates
+
+
+def not_modified_since(request, last_modified):
+    # last_modified is a naive UTC datetime; HTTP dates have 1 s precision
+    since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return since is not None and _timestamp(last_modified) <= since
+
+
+def etag_response(request, body, etag, cache_control='private, no-cache', last_modified=None):
+    # 304 with no body when the client already holds this version.
+    # If-None-Match wins over If-Modified-Since when both are sent.
+    if request.headers.get('If-None-Match'):
+        fresh = etag_matches(request, etag)
+    else:
+        fresh = last_modified is not None and not_modified_since(request, last_modified)
+
+    if fresh:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(_timestamp(last_modified))
+    return response
+
+
+def _timestamp(moment):
+    return calendar.timegm(moment.utctimetuple())
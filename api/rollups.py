@@ -0,0 +1,141 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import case, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from .database import get_meta, set_meta
+from .models import Transaction, TransactionRollup
+from .oracle import price_oracle
+
+# Bump to force bootstrap_db to rebuild the rollup table from the ledger
+ROLLUP_VERSION = 1
+ROLLUP_META_KEY = 'tx_rollup_version'
+HOUR = timedelta(hours=1)
+
+
+def hour_bucket(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def estimated_usd_expression():
+    # SQL twin of views._estimate_tx_usd
+    return case(
+        (Transaction.usd_value > 0, Transaction.usd_value),
+        else_=Transaction.from_amount * price_oracle.sql_price(Transaction.from_token_symbol)
+    )
+
+
+def estimate_usd(tx):
+    if tx.usd_value is not None and tx.usd_value > 0:
+        return float(tx.usd_value)
+    return float(tx.from_amount or 0) * price_oracle.price(tx.from_token_symbol)
+
+
+def record_transactions(db, transactions):
+    # Adds new ledger rows to their hourly buckets inside the caller's
+    # transaction, so rollups commit (or roll back) together with the rows.
+    deltas = defaultdict(lambda: [0, 0.0])
+    for tx in transactions:
+        if tx.created_at is None:
+            tx.created_at = datetime.utcnow()
+        delta = deltas[(hour_bucket(tx.created_at), tx.from_token_symbol or 'UNKNOWN')]
+        delta[0] += 1
+        delta[1] += estimate_usd(tx)
+    for (bucket, symbol), (count, usd) in deltas.items():
+        _upsert_bucket(db, bucket, symbol, count, usd)
+
+
+def record_transaction(db, tx):
+    record_transactions(db, [tx])
+
+
+def rebuild_rollups(db):
+    # One GROUP BY pass over the ledger; used on bootstrap and after bulk loads
+    dialect = db.get_bind().dialect.name
+    if dialect == 'postgresql':
+        bucket = func.date_trunc('hour', Transaction.created_at)
+    else:
+        bucket = func.strftime('%Y-%m-%d %H:00:00', Transaction.created_at)
+
+    rows = db.execute(
+        select(
+            bucket,
+            Transaction.from_token_symbol,
+            func.count(Transaction.id),
+            func.sum(estimated_usd_expression())
+        ).where(Transaction.created_at.isnot(None)).group_by(bucket, Transaction.from_token_symbol)
+    ).all()
+
+    db.query(TransactionRollup).delete(synchronize_session=False)
+    if rows:
+        db.execute(insert(TransactionRollup), [
+            {
+                'bucket_start': value if isinstance(value, datetime) else datetime.fromisoformat(value),
+                'token_symbol': symbol or 'UNKNOWN',
+                'tx_count': count,
+                'usd_volume': float(usd or 0),
+            }
+            for value, symbol, count, usd in rows
+        ])
+    set_meta(db, ROLLUP_META_KEY, ROLLUP_VERSION)
+    db.commit()
+    return len(rows)
+
+
+def ensure_rollups(db, force=False):
+    built = get_meta(db, ROLLUP_META_KEY)
+    if force or built is None or int(built) < ROLLUP_VERSION:
+        return rebuild_rollups(db)
+    return None
+
+
+def overview_totals(db, since):
+    # Totals read O(buckets) rollup rows; only the partial first hour of the
+    # `since` window is summed from the ledger itself.
+    total_count, total_usd = db.query(
+        func.coalesce(func.sum(TransactionRollup.tx_count), 0),
+        func.coalesce(func.sum(TransactionRollup.usd_volume), 0.0)
+    ).one()
+
+    boundary = hour_bucket(since) + HOUR
+    window_usd = db.query(func.coalesce(func.sum(TransactionRollup.usd_volume), 0.0)).filter(
+        TransactionRollup.bucket_start >= boundary
+    ).scalar()
+    edge_usd = db.query(func.coalesce(func.sum(estimated_usd_expression()), 0.0)).filter(
+        Transaction.created_at >= since,
+        Transaction.created_at < boundary
+    ).scalar()
+
+    return {
+        'transactions': int(total_count),
+        'totalUsd': float(total_usd),
+        'windowUsd': float(window_usd) + float(edge_usd),
+    }
+
+
+def _upsert_bucket(db, bucket, symbol, count, usd):
+    dialect = db.get_bind().dialect.name
+    values = {'bucket_start': bucket, 'token_symbol': symbol, 'tx_count': count, 'usd_volume': usd}
+    if dialect in ('sqlite', 'postgresql'):
+        dialect_insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        stmt = dialect_insert(TransactionRollup).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['bucket_start', 'token_symbol'],
+            set_={
+                'tx_count': TransactionRollup.tx_count + stmt.excluded.tx_count,
+                'usd_volume': TransactionRollup.usd_volume + stmt.excluded.usd_volume,
+            }
+        )
+        db.execute(stmt)
+        return
+
+    result = db.execute(
+        update(TransactionRollup).where(
+            TransactionRollup.bucket_start == bucket,
+            TransactionRollup.token_symbol == symbol
+        ).values(
+            tx_count=TransactionRollup.tx_count + count,
+            usd_volume=TransactionRollup.usd_volume + usd
+        )
+    )
+    if result.rowcount == 0:
+        db.execute(insert(TransactionRollup).values(**values))
@@ -0,0 +1,88 @@
+from sqlalchemy import inspect, text
+from .database import engine, get_meta, set_meta, SessionLocal
+
+# Ordered, append-only schema steps for databases created before a model
+# change. create_all() builds fresh tables in their final shape, so every
+# step must be idempotent. Never edit a released step; add a new one.
+
+SCHEMA_VERSION_KEY = 'schema_version'
+
+
+def _add_transaction_usd_value(conn):
+    columns = {col['name'] for col in inspect(conn).get_columns('transactions')}
+    if 'usd_value' not in columns:
+        conn.execute(text('ALTER TABLE transactions ADD COLUMN usd_value FLOAT DEFAULT 0'))
+
+
+def _dedupe_wallets(conn):
+    # Concurrent _ensure_wallet calls could create two rows for one
+    # (user, mint); fold their balances into the oldest row before the
+    # unique index goes on.
+    duplicates = conn.execute(text(
+        'SELECT user_id, token_mint, MIN(id), SUM(balance) FROM wallets '
+        'GROUP BY user_id, token_mint HAVING COUNT(*) > 1'
+    )).all()
+    for user_id, token_mint, keep_id, balance in duplicates:
+        conn.execute(
+            text('UPDATE wallets SET balance = :balance WHERE id = :id'),
+            {'balance': balance, 'id': keep_id}
+        )
+        conn.execute(
+            text('DELETE FROM wallets WHERE user_id = :user_id AND token_mint = :mint AND id <> :id'),
+            {'user_id': user_id, 'mint': token_mint, 'id': keep_id}
+        )
+
+
+def _add_hot_query_indexes(conn):
+    _dedupe_wallets(conn)
+    conn.execute(text(
+        'CREATE UNIQUE INDEX IF NOT EXISTS uq_wallets_user_mint ON wallets (user_id, token_mint)'
+    ))
+    conn.execute(text(
+        'CREATE INDEX IF NOT EXISTS ix_transactions_user_created ON transactions (user_id, created_at, id)'
+    ))
+    conn.execute(text(
+        'CREATE INDEX IF NOT EXISTS ix_transactions_created ON transactions (created_at, id)'
+    ))
+
+
+def _add_user_balance_version(conn):
+    columns = {col['name'] for col in inspect(conn).get_columns('users')}
+    if 'balance_version' not in columns:
+        conn.execute(text('ALTER TABLE users ADD COLUMN balance_version INTEGER NOT NULL DEFAULT 0'))
+
+
+MIGRATIONS = [
+    (1, 'transactions.usd_value column', _add_transaction_usd_value),
+    (2, 'wallet/transaction hot query indexes', _add_hot_query_indexes),
+    (3, 'users.balance_version column', _add_user_balance_version),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version():
+    db = SessionLocal()
+    try:
+        return int(get_meta(db, SCHEMA_VERSION_KEY, 0))
+    finally:
+        db.close()
+
+
+def migrate():
+    # Applies pending steps in order, each in its own transaction together
+    # with the version bump. Returns the names of the steps that ran.
+    applied = []
+    version = current_version()
+    for step_version, name, step in MIGRATIONS:
+        if step_version <= version:
+            continue
+        with engine.begin() as conn:
+            step(conn)
+            db = SessionLocal(bind=conn)
+            try:
+                set_meta(db, SCHEMA_VERSION_KEY, step_version)
+                db.flush()
+            finally:
+                db.close()
+        applied.append(name)
+    return applied
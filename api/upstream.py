@@ -0,0 +1,212 @@
+import asyncio
+import os
+import threading
+import time
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+JUPITER_API_URL = getattr(settings, 'JUPITER_API_URL', 'https://lite-api.jup.ag')
+COINGECKO_API_URL = getattr(settings, 'COINGECKO_API_URL', 'https://api.coingecko.com/api/v3')
+
+UPSTREAM_POOL_SIZE = int(os.environ.get('UPSTREAM_POOL_SIZE', '20'))
+UPSTREAM_MAX_RETRIES = int(os.environ.get('UPSTREAM_MAX_RETRIES', '2'))
+UPSTREAM_RETRY_BACKOFF = float(os.environ.get('UPSTREAM_RETRY_BACKOFF', '0.2'))
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get('UPSTREAM_BREAKER_FAILURES', '5'))
+BREAKER_RESET_SECONDS = float(os.environ.get('UPSTREAM_BREAKER_RESET_SECONDS', '30'))
+ASYNC_UPSTREAM_MAX_CONNECTIONS = int(os.environ.get('ASYNC_UPSTREAM_MAX_CONNECTIONS', '1000'))
+ASYNC_UPSTREAM_KEEPALIVE = int(os.environ.get('ASYNC_UPSTREAM_KEEPALIVE', '100'))
+
+CONNECT_TIMEOUT = 3.05
+DEFAULT_TIMEOUT = (CONNECT_TIMEOUT, 10)
+# (connect, read) timeouts per logical endpoint
+UPSTREAM_TIMEOUTS = {
+    'search': (CONNECT_TIMEOUT, 5),
+    'shield': (CONNECT_TIMEOUT, 5),
+    'order': (CONNECT_TIMEOUT, 10),
+    'execute': (CONNECT_TIMEOUT, 30),
+    'holdings': (CONNECT_TIMEOUT, 10),
+    'token_info': (CONNECT_TIMEOUT, 5),
+    'market_chart': (CONNECT_TIMEOUT, 10),
+    'simple_price': (CONNECT_TIMEOUT, 5),
+}
+
+BREAKER_CLOSED = 'closed'
+BREAKER_OPEN = 'open'
+BREAKER_HALF_OPEN = 'half-open'
+
+
+class UpstreamUnavailable(requests.ConnectionError):
+    #Raised without touching the network while a circuit breaker is open
+    pass
+
+
+class CircuitBreaker:
+    #Opens after N consecutive failures, lets one probe through after the reset timeout
+
+    def __init__(self, name, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_seconds=BREAKER_RESET_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.state == BREAKER_CLOSED:
+                return
+            if self.state == BREAKER_OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = BREAKER_HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == BREAKER_HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            raise UpstreamUnavailable(f'{self.name} is unavailable, retry later')
+
+    def record_success(self):
+        with self._lock:
+            self.state = BREAKER_CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == BREAKER_HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = BREAKER_OPEN
+                self.opened_at = time.monotonic()
+
+    def release_probe(self):
+        # The call ended without a verdict on the upstream (cancelled, or a
+        # non-HTTP error): let the next call probe instead of blocking forever
+        with self._lock:
+            self._probe_in_flight = False
+
+    def stats(self):
+        with self._lock:
+            return {'state': self.state, 'failures': self.failures}
+
+
+class UpstreamClient:
+    #Keep-alive session with its own connection pool for a single upstream host
+
+    def __init__(self, name, base_url, timeouts=None):
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.timeouts = timeouts or {}
+        self.breaker = CircuitBreaker(name)
+        retry = Retry(
+            total=UPSTREAM_MAX_RETRIES,
+            backoff_factor=UPSTREAM_RETRY_BACKOFF,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=UPSTREAM_POOL_SIZE, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, method, path, endpoint=None, **kwargs):
+        self.breaker.before_call()
+        kwargs.setdefault('timeout', self.timeouts.get(endpoint, DEFAULT_TIMEOUT))
+        try:
+            response = self.session.request(method, f'{self.base_url}{path}', **kwargs)
+        except requests.RequestException:
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            self.breaker.release_probe()
+            raise
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    def get(self, path, endpoint=None, **kwargs):
+        return self.request('GET', path, endpoint=endpoint, **kwargs)
+
+    def post(self, path, endpoint=None, **kwargs):
+        return self.request('POST', path, endpoint=endpoint, **kwargs)
+
+
+class AsyncUpstreamClient:
+    #Non-blocking twin of an UpstreamClient, shares its base URL, timeouts and breaker
+
+    RETRY_STATUSES = (502, 503, 504)
+
+    def __init__(self, sync_client):
+        self.name = sync_client.name
+        self.base_url = sync_client.base_url
+        self.timeouts = sync_client.timeouts
+        self.breaker = sync_client.breaker
+        self._client = None
+        self._loop = None
+
+    def _get_client(self):
+        # httpx.AsyncClient is bound to the loop it was created on
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=httpx.Limits(
+                    max_connections=ASYNC_UPSTREAM_MAX_CONNECTIONS,
+                    max_keepalive_connections=ASYNC_UPSTREAM_KEEPALIVE,
+                ),
+                transport=httpx.AsyncHTTPTransport(retries=UPSTREAM_MAX_RETRIES),
+            )
+            self._loop = loop
+        return self._client
+
+    async def request(self, method, path, endpoint=None, **kwargs):
+        self.breaker.before_call()
+        connect, read = self.timeouts.get(endpoint, DEFAULT_TIMEOUT)
+        kwargs.setdefault('timeout', httpx.Timeout(read, connect=connect))
+        client = self._get_client()
+        attempts = UPSTREAM_MAX_RETRIES + 1 if method == 'GET' else 1
+        try:
+            for attempt in range(attempts):
+                response = await client.request(method, path, **kwargs)
+                if response.status_code not in self.RETRY_STATUSES or attempt == attempts - 1:
+                    break
+                await asyncio.sleep(UPSTREAM_RETRY_BACKOFF * (2 ** attempt))
+        except httpx.HTTPError:
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            # Includes CancelledError when the ASGI client disconnects
+            self.breaker.release_probe()
+            raise
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+    async def get(self, path, endpoint=None, **kwargs):
+        return await self.request('GET', path, endpoint=endpoint, **kwargs)
+
+    async def post(self, path, endpoint=None, **kwargs):
+        return await self.request('POST', path, endpoint=endpoint, **kwargs)
+
+
+# Errors an async proxy view should turn into an error response
+ASYNC_UPSTREAM_ERRORS = (httpx.HTTPError, UpstreamUnavailable, ValueError)
+
+jupiter = UpstreamClient('jupiter', JUPITER_API_URL, UPSTREAM_TIMEOUTS)
+coingecko = UpstreamClient('coingecko', COINGECKO_API_URL, UPSTREAM_TIMEOUTS)
+UPSTREAMS = (jupiter, coingecko)
+
+async_jupiter = AsyncUpstreamClient(jupiter)
+async_coingecko = AsyncUpstreamClient(coingecko)
+
+
+def upstream_stats():
+    return {client.name: client.breaker.stats() for client in UPSTREAMS}
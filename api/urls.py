@@ -1,21 +1,30 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+if settings.ASYNC_UPSTREAM_VIEWS:
+    from . import async_views as proxy_views
+else:
+    proxy_views = views
+
 urlpatterns = [
-    path('search/', views.SearchTokenView.as_view(), name='search'),
-    path('shield/', views.ShieldView.as_view(), name='shield'),
-    path('order/', views.OrderView.as_view(), name='order'),
-    path('execute/', views.ExecuteView.as_view(), name='execute'),
-    path('holdings/<str:address>/', views.HoldingsView.as_view(), name='holdings'),
+    path('search/', proxy_views.SearchTokenView.as_view(), name='search'),
+    path('shield/', proxy_views.ShieldView.as_view(), name='shield'),
+    path('order/', proxy_views.OrderView.as_view(), name='order'),
+    path('execute/', proxy_views.ExecuteView.as_view(), name='execute'),
+    path('holdings/<str:address>/', proxy_views.HoldingsView.as_view(), name='holdings'),
     
     path('auth/register/', views.RegisterView.as_view(), name='register'),
     path('auth/login/', views.LoginView.as_view(), name='login'),
     path('auth/me/', views.MeView.as_view(), name='me'),
+    path('auth/logout/', views.LogoutView.as_view(), name='logout'),
     
     path('wallet/balance/', views.WalletBalanceView.as_view(), name='wallet_balance'),
     path('wallet/deposit/', views.DepositView.as_view(), name='deposit'),
     
     path('swap/', views.SwapView.as_view(), name='swap'),
+    path('quote/', views.QuoteView.as_view(), name='quote'),
+    path('batch/', views.BatchView.as_view(), name='batch'),
     path('transactions/', views.TransactionListView.as_view(), name='transactions'),
 
     path('news/', views.NewsListView.as_view(), name='news'),
@@ -23,11 +32,14 @@ urlpatterns = [
     path('admin/overview/', views.AdminOverviewView.as_view(), name='admin_overview'),
     path('admin/profiles/', views.AdminProfilesView.as_view(), name='admin_profiles'),
     path('admin/transactions/', views.AdminTransactionsView.as_view(), name='admin_transactions'),
+    path('admin/transactions/export/', views.AdminTransactionsExportView.as_view(), name='admin_transactions_export'),
+    path('admin/cache/', views.AdminCacheStatsView.as_view(), name='admin_cache'),
     path('admin/news/', views.AdminNewsView.as_view(), name='admin_news'),
     path('admin/news/<int:news_id>/', views.AdminNewsDeleteView.as_view(), name='admin_news_delete'),
     
     path('tokens/', views.TokenListView.as_view(), name='tokens'),
-    path('price/<str:token>/', views.PriceHistoryView.as_view(), name='price_history'),
+    path('price/<str:token>/', proxy_views.PriceHistoryView.as_view(), name='price_history'),
+    path('prices/', views.PricesView.as_view(), name='prices'),
     
     path('init-db/', views.InitDatabaseView.as_view(), name='init_db'),
 ]
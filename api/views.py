@@ -1,32 +1,48 @@
 import json
+import math
 import os
 import random
+import threading
+import uuid
+from collections import defaultdict
 from datetime import datetime, timedelta
 import requests
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from django.views import View
-from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from sqlalchemy import func
-from .database import SessionLocal, init_db
-from .models import User, Wallet, Transaction, TransactionStatus, NewsPost, COMMON_TOKENS
-from .auth import hash_password, verify_password, create_token, login_required
+from .database import SessionLocal, init_db, get_meta, set_meta
+from .models import User, Wallet, Transaction, TransactionStatus, NewsPost, AppMeta, COMMON_TOKENS
+from .auth import (
+    hash_password, verify_password, needs_rehash, create_token, login_required, PasswordHasherBusy, is_admin_email, revoke_token,
+    get_token_from_request, ADMIN_EMAIL, ADMIN_EMAILS, DANIYAR_ADMIN_EMAIL
+)
+from .cache import LRUCache, VersionedCache, proxy_cache, order_flight
+from .oracle import price_oracle
+from .rollups import estimate_usd, estimated_usd_expression, record_transaction, record_transactions, ensure_rollups, overview_totals
+from .ledger import run_atomic, debit, credit, ensure_wallet, top_up, set_balance, wallet_exists, balance_version, group_committer, InsufficientBalance, LedgerBusy, LEDGER_GROUP_COMMIT
+from .quotes import quote, QuoteError, LOCAL_TOKENS, SWAP_FEE_BPS
+from .responses import JsonResponse, json_body, etag_for, etag_response
+from .export import EXPORT_FORMATS, ExportFilterError, parse_filters, export_chunks, as_async
+from .pagination import decode_cursor, after_cursor, before_cursor, next_cursor
+from .price_history import COINGECKO_IDS, load_price_history, parse_days, parse_points, downsample_lttb
+from .upstream import jupiter, upstream_stats, UpstreamUnavailable
 
-JUPITER_API_URL = getattr(settings, 'JUPITER_API_URL', 'https://lite-api.jup.ag')
-ADMIN_EMAIL = os.environ.get('AGGREGATOR_ADMIN_EMAIL', 'admin@aggregator.local').lower()
 ADMIN_PASSWORD = os.environ.get('AGGREGATOR_ADMIN_PASSWORD', 'admin')
-DANIYAR_ADMIN_EMAIL = 'daniyar@gmail.com'
 DANIYAR_ADMIN_PASSWORD = 'daniyar'
-ADMIN_EMAILS = [ADMIN_EMAIL, DANIYAR_ADMIN_EMAIL]
 TARGET_DEMO_PROFILES = 25
-TOKEN_PRICE_USD = {
-    'SOL': 98.0,
-    'USDC': 1.0,
-    'USDT': 1.0,
-    'BONK': 0.000025,
-    'JUP': 0.85,
-}
+BATCH_MAX_OPERATIONS = int(os.environ.get('BATCH_MAX_OPERATIONS', '500'))
+USER_CACHE_MAX_ENTRIES = int(os.environ.get('USER_CACHE_MAX_ENTRIES', '10000'))
+# Cache-Control max-age (seconds) for public, shared-cacheable responses
+NEWS_CACHE_MAX_AGE = int(os.environ.get('NEWS_CACHE_MAX_AGE', '30'))
+TOKEN_LIST_MAX_AGE = int(os.environ.get('TOKEN_LIST_MAX_AGE', '3600'))
+# Bump when ensure_demo_data starts producing different data
+DEMO_SEED_VERSION = 1
+DEMO_SEED_META_KEY = 'demo_seed_version'
+# Replaced with a fresh token whenever news_posts changes; its updated_at is the feed's Last-Modified
+NEWS_VERSION_META_KEY = 'news_version'
 DEFAULT_NEWS = [
     {
         'id': 2,
@@ -50,27 +66,41 @@ DEFAULT_NEWS = [
         'category': 'Team'
     },
 ]
-def is_admin_email(email):
-    return (email or '').strip().lower() in [e.lower() for e in ADMIN_EMAILS]
+def _page_limit(request, default, lowest, highest):
+    # ValueError goes to the caller's 400 path, like a bad cursor
+    try:
+        limit = int(request.GET.get('limit', default))
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+    return max(lowest, min(limit, highest))
+
+def _finite(value):
+    # float() accepts NaN/Infinity and json.loads parses them; they compare
+    # False against everything and would reach the ledger as NULL
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError('Amounts must be finite numbers')
+    return number
 
 def _admin_guard(request):
-    if not is_admin_email(getattr(request, 'user_email', '')):
+    if not getattr(request, 'is_admin', False):
         return JsonResponse(
             {'error': 'Admin access required', 'hint': f'Login as {ADMIN_EMAIL}'},
             status=403
         )
     return None
 
+_me_cache = LRUCache(USER_CACHE_MAX_ENTRIES)
+# user_id -> (etag, serialized balances), tagged with users.balance_version
+_balance_cache = VersionedCache(USER_CACHE_MAX_ENTRIES)
+# 'feed' -> (etag, serialized news), tagged with the news_version token
+_news_cache = VersionedCache(1)
+
 def _price_for_symbol(symbol):
-    return TOKEN_PRICE_USD.get((symbol or '').upper(), 1.0)
+    return price_oracle.price(symbol)
 
 def _estimate_tx_usd(tx):
-    if tx.usd_value is not None and tx.usd_value > 0:
-        return float(tx.usd_value)
-    return float(tx.from_amount or 0) * _price_for_symbol(tx.from_token_symbol)
-
-def _wallet_usd(wallet):
-    return float(wallet.balance or 0) * _price_for_symbol(wallet.token_symbol)
+    return estimate_usd(tx)
 
 STARTER_BALANCES = {
     'SOL': 1.5,
@@ -80,36 +110,27 @@ STARTER_BALANCES = {
     'JUP': 25.0,
 }
 
-def _ensure_wallet(db, user_id, token, balance):
-    wallet = db.query(Wallet).filter(
-        Wallet.user_id == user_id,
-        Wallet.token_mint == token['mint']
-    ).first()
-    if not wallet:
-        wallet = Wallet(
-            user_id=user_id,
-            token_mint=token['mint'],
-            token_symbol=token['symbol'],
-            token_name=token['name'],
-            token_icon=token['icon'],
-            token_decimals=token['decimals'],
-            balance=balance
-        )
-        db.add(wallet)
-    return wallet
-
 def ensure_user_balances(db, user_id, is_admin=False):
+    # Straight UPDATEs through the ledger helpers: a read-modify-write here
+    # could undo a deposit or swap committed in between
     for token in COMMON_TOKENS:
-        wallet = _ensure_wallet(db, user_id, token, balance=0.0)
+        ensure_wallet(db, user_id, token)
         if is_admin:
-            wallet.balance = 10000.0 if token['symbol'] == 'USDC' else 0.0
+            set_balance(db, user_id, token['mint'], 10000.0 if token['symbol'] == 'USDC' else 0.0)
             continue
-        target_balance = STARTER_BALANCES.get(token['symbol'], 10.0)
-        if wallet.balance < target_balance:
-            wallet.balance = float(target_balance)
+        top_up(db, user_id, token['mint'], float(STARTER_BALANCES.get(token['symbol'], 10.0)))
+
+def bump_news_version(db):
+    # Caller commits, together with the news change. A random token needs no
+    # read-modify-write, so two concurrent admin edits can't share a version.
+    set_meta(db, NEWS_VERSION_META_KEY, uuid.uuid4().hex)
 
 def ensure_news_seed(db):
     if db.query(NewsPost).count() > 0:
+        if db.get(AppMeta, NEWS_VERSION_META_KEY) is None:
+            # Feed written before news versions existed
+            bump_news_version(db)
+            db.commit()
         return
     for item in DEFAULT_NEWS:
         post = NewsPost(
@@ -120,6 +141,7 @@ def ensure_news_seed(db):
             created_at=datetime.strptime(item['date'], '%Y-%m-%d')
         )
         db.add(post)
+    bump_news_version(db)
     db.commit()
 
 def _log_user_transaction(db, user_id, from_token, to_token, from_amount, to_amount, usd_value):
@@ -138,6 +160,19 @@ def _log_user_transaction(db, user_id, from_token, to_token, from_amount, to_amo
         status=TransactionStatus.COMPLETED
     )
     db.add(tx)
+    record_transaction(db, tx)
+
+def random_swap_amounts(randomizer, from_symbol, to_symbol, price_for_symbol=_price_for_symbol):
+    # Plausible demo swap sizes per token; also used by generate_load_data
+    if from_symbol in ('USDC', 'USDT'):
+        from_amount = round(randomizer.uniform(25, 400), 2)
+    elif from_symbol == 'BONK':
+        from_amount = round(randomizer.uniform(15000, 800000), 2)
+    else:
+        from_amount = round(randomizer.uniform(0.1, 8), 4)
+    usd_value = round(from_amount * price_for_symbol(from_symbol), 2)
+    to_amount = round(max(0.000001, usd_value / price_for_symbol(to_symbol) * randomizer.uniform(0.985, 1.015)), 6)
+    return from_amount, to_amount, usd_value
 
 def ensure_demo_data(db):
     randomizer = random.Random(42)
@@ -177,9 +212,8 @@ def ensure_demo_data(db):
             balance = round(randomizer.uniform(1, 25), 4)
             if token['symbol'] in ('USDC', 'USDT'):
                 balance = round(randomizer.uniform(100, 800), 2)
-            wallet = _ensure_wallet(db, user.id, token, balance=balance)
-            if wallet.balance <= 0:
-                wallet.balance = balance
+            ensure_wallet(db, user.id, token)
+            top_up(db, user.id, token['mint'], balance)
         db.commit()
 
         tx_count = randomizer.randint(2, 5)
@@ -187,14 +221,7 @@ def ensure_demo_data(db):
             from_token, to_token = randomizer.sample(COMMON_TOKENS, 2)
             from_symbol = from_token['symbol']
             to_symbol = to_token['symbol']
-            if from_symbol in ('USDC', 'USDT'):
-                from_amount = round(randomizer.uniform(25, 400), 2)
-            elif from_symbol == 'BONK':
-                from_amount = round(randomizer.uniform(15000, 800000), 2)
-            else:
-                from_amount = round(randomizer.uniform(0.1, 8), 4)
-            usd_value = round(from_amount * _price_for_symbol(from_symbol), 2)
-            to_amount = round(max(0.000001, usd_value / _price_for_symbol(to_symbol) * randomizer.uniform(0.985, 1.015)), 6)
+            from_amount, to_amount, usd_value = random_swap_amounts(randomizer, from_symbol, to_symbol)
             created_at = datetime.utcnow() - timedelta(
                 days=randomizer.randint(0, 14),
                 hours=randomizer.randint(0, 23),
@@ -216,45 +243,111 @@ def ensure_demo_data(db):
                 created_at=created_at
             )
             db.add(transaction)
+            record_transaction(db, transaction)
         db.commit()
         created += 1
 
     all_users = db.query(User).all()
     for user in all_users:
         ensure_user_balances(db, user.id, is_admin=is_admin_email(user.email))
+    set_meta(db, DEMO_SEED_META_KEY, DEMO_SEED_VERSION)
     db.commit()
     ensure_news_seed(db)
 
-def _user_stats(db, user):
-    wallets = db.query(Wallet).filter(Wallet.user_id == user.id).all()
-    transactions = db.query(Transaction).filter(Transaction.user_id == user.id).all()
-    total_usd = sum(_estimate_tx_usd(tx) for tx in transactions)
-
-    tx_dates = [tx.created_at for tx in transactions if tx.created_at]
-    last_tx = max(tx_dates) if tx_dates else None
-
-    return {
-        'id': user.id,
-        'email': user.email,
-        'createdAt': user.created_at.isoformat() if user.created_at else None,
-        'walletCount': len(wallets),
-        'transactionCount': len(transactions),
-        'walletUsdValue': round(sum(_wallet_usd(w) for w in wallets), 2),
-        'totalUsdTransferred': round(total_usd, 2),
-        'lastTransactionAt': last_tx.isoformat() if last_tx else None
-    }
-
+_demo_seed_lock = threading.Lock()
+_demo_seed_checked = False
 
-# Make sure tables exist on first import in local/dev mode.
-init_db()
-_bootstrap_db = SessionLocal()
-try:
-    ensure_demo_data(_bootstrap_db)
-finally:
-    _bootstrap_db.close()
+def ensure_demo_data_once(db):
+    # Hot-path variant for admin views: reads the persisted seed marker once
+    # per process and only falls back to ensure_demo_data when it is missing.
+    global _demo_seed_checked
+    if _demo_seed_checked:
+        return
+    with _demo_seed_lock:
+        if _demo_seed_checked:
+            return
+        seeded = get_meta(db, DEMO_SEED_META_KEY)
+        if seeded is None or int(seeded) < DEMO_SEED_VERSION:
+            ensure_demo_data(db)
+        _demo_seed_checked = True
+
+def _profile_stats(db, users):
+    # Wallet and ledger aggregates for a whole page of users in two grouped queries
+    user_ids = [user.id for user in users]
+    wallet_rows = db.query(
+        Wallet.user_id,
+        func.count(Wallet.id),
+        func.sum(Wallet.balance * price_oracle.sql_price(Wallet.token_symbol))
+    ).filter(Wallet.user_id.in_(user_ids)).group_by(Wallet.user_id).all()
+    tx_rows = db.query(
+        Transaction.user_id,
+        func.count(Transaction.id),
+        func.sum(estimated_usd_expression()),
+        func.max(Transaction.created_at)
+    ).filter(Transaction.user_id.in_(user_ids)).group_by(Transaction.user_id).all()
+
+    wallets = {user_id: (count, usd) for user_id, count, usd in wallet_rows}
+    transactions = {user_id: (count, usd, last_tx) for user_id, count, usd, last_tx in tx_rows}
+
+    profiles = []
+    for user in users:
+        wallet_count, wallet_usd = wallets.get(user.id, (0, 0.0))
+        tx_count, total_usd, last_tx = transactions.get(user.id, (0, 0.0, None))
+        profiles.append({
+            'id': user.id,
+            'email': user.email,
+            'createdAt': user.created_at,
+            'walletCount': wallet_count,
+            'transactionCount': tx_count,
+            'walletUsdValue': round(float(wallet_usd or 0), 2),
+            'totalUsdTransferred': round(float(total_usd or 0), 2),
+            'lastTransactionAt': last_tx
+        })
+    return profiles
+
+
+def bootstrap_database(seed_demo_data=True, rebuild_rollups=False):
+    # Idempotent schema setup + demo seeding. Run once per deploy with
+    # `python manage.py bootstrap_db`, never at import time.
+    applied = init_db()
+    db = SessionLocal()
+    try:
+        if seed_demo_data:
+            ensure_demo_data(db)
+        ensure_rollups(db, force=rebuild_rollups)
+    finally:
+        db.close()
+    return applied
 
 # Jupiter API Proxy Views
 
+def _upstream_error(exc):
+    status = 503 if isinstance(exc, UpstreamUnavailable) else 500
+    return JsonResponse({'error': str(exc)}, status=status)
+
+def _busy(exc):
+    # Overload (ledger locks, password pool backlog): ask the client to retry
+    response = JsonResponse({'error': str(exc)}, status=503)
+    response['Retry-After'] = '1'
+    return response
+
+def _cached_jupiter_get(endpoint, path, params=None):
+    # Read-only Jupiter lookups go through proxy_cache; 4xx bodies are passed
+    # through but never cached, 5xx counts as an upstream failure.
+    def load():
+        response = jupiter.get(path, endpoint=endpoint, params=params)
+        if response.status_code >= 500:
+            response.raise_for_status()
+        return response.status_code, response.json()
+
+    key = (path, tuple(sorted((params or {}).items())))
+    (status, payload), cache_state = proxy_cache.fetch(
+        endpoint, key, load, cacheable=lambda value: value[0] < 400
+    )
+    response = JsonResponse(payload, safe=False)
+    response['X-Cache'] = cache_state
+    return response
+
 class SearchTokenView(View):
     #Proxy for Jupiter token search API
     
@@ -265,14 +358,9 @@ class SearchTokenView(View):
             return JsonResponse({'error': 'Query parameter is required'}, status=400)
         
         try:
-            response = requests.get(
-                f'{JUPITER_API_URL}/ultra/v1/search',
-                params={'query': query},
-                timeout=10
-            )
-            return JsonResponse(response.json(), safe=False)
+            return _cached_jupiter_get('search', '/ultra/v1/search', params={'query': query})
         except requests.RequestException as e:
-            return JsonResponse({'error': str(e)}, status=500)
+            return _upstream_error(e)
 
 
 class ShieldView(View):
@@ -285,14 +373,9 @@ class ShieldView(View):
             return JsonResponse({'error': 'Mints parameter is required'}, status=400)
         
         try:
-            response = requests.get(
-                f'{JUPITER_API_URL}/ultra/v1/shield',
-                params={'mints': mints},
-                timeout=10
-            )
-            return JsonResponse(response.json(), safe=False)
+            return _cached_jupiter_get('shield', '/ultra/v1/shield', params={'mints': mints})
         except requests.RequestException as e:
-            return JsonResponse({'error': str(e)}, status=500)
+            return _upstream_error(e)
 
 
 class OrderView(View):
@@ -318,15 +401,19 @@ class OrderView(View):
         if taker:
             params['taker'] = taker
         
+        def load():
+            response = jupiter.get('/ultra/v1/order', endpoint='order', params=params)
+            return response.status_code, response.json()
+
         try:
-            response = requests.get(
-                f'{JUPITER_API_URL}/ultra/v1/order',
-                params=params,
-                timeout=15
-            )
-            return JsonResponse(response.json(), safe=False)
+            # Identical quotes in flight share one Jupiter call
+            key = tuple(sorted(params.items()))
+            (status, payload), shared = order_flight.do(key, load, cacheable=lambda value: value[0] < 400)
+            response = JsonResponse(payload, safe=False)
+            response['X-Coalesced'] = 'true' if shared else 'false'
+            return response
         except requests.RequestException as e:
-            return JsonResponse({'error': str(e)}, status=500)
+            return _upstream_error(e)
 
 
 @method_decorator(csrf_exempt, name='dispatch')
@@ -344,20 +431,20 @@ class ExecuteView(View):
                     'error': 'signedTransaction and requestId are required'
                 }, status=400)
             
-            response = requests.post(
-                f'{JUPITER_API_URL}/ultra/v1/execute',
+            response = jupiter.post(
+                '/ultra/v1/execute',
+                endpoint='execute',
                 json={
                     'signedTransaction': signed_transaction,
                     'requestId': request_id,
                 },
-                headers={'Content-Type': 'application/json'},
-                timeout=30
+                headers={'Content-Type': 'application/json'}
             )
             return JsonResponse(response.json(), safe=False)
         except json.JSONDecodeError:
             return JsonResponse({'error': 'Invalid JSON'}, status=400)
         except requests.RequestException as e:
-            return JsonResponse({'error': str(e)}, status=500)
+            return _upstream_error(e)
 
 
 class HoldingsView(View):
@@ -368,13 +455,9 @@ class HoldingsView(View):
             return JsonResponse({'error': 'Address is required'}, status=400)
         
         try:
-            response = requests.get(
-                f'{JUPITER_API_URL}/ultra/v1/holdings/{address}',
-                timeout=15
-            )
-            return JsonResponse(response.json(), safe=False)
+            return _cached_jupiter_get('holdings', f'/ultra/v1/holdings/{address}')
         except requests.RequestException as e:
-            return JsonResponse({'error': str(e)}, status=500)
+            return _upstream_error(e)
 
 # Authentication Views
 
@@ -427,6 +510,8 @@ class RegisterView(View):
                 
         except json.JSONDecodeError:
             return JsonResponse({'error': 'Invalid JSON'}, status=400)
+        except PasswordHasherBusy as e:
+            return _busy(e)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
 
@@ -450,6 +535,15 @@ class LoginView(View):
                 
                 if not verify_password(password, user.password_hash):
                     return JsonResponse({'error': 'Invalid email or password'}, status=401)
+
+                if needs_rehash(user.password_hash):
+                    # Move the stored hash to the current BCRYPT_ROUNDS; a
+                    # busy pool just postpones this to the next login
+                    try:
+                        user.password_hash = hash_password(password)
+                        db.commit()
+                    except PasswordHasherBusy:
+                        pass
                 
                 token = create_token(user.id, user.email)
                 
@@ -467,6 +561,8 @@ class LoginView(View):
                 
         except json.JSONDecodeError:
             return JsonResponse({'error': 'Invalid JSON'}, status=400)
+        except PasswordHasherBusy as e:
+            return _busy(e)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
 
@@ -474,48 +570,75 @@ class LoginView(View):
 class MeView(View):    
     @login_required
     def get(self, request):
+        # Users never change email, so the profile is cached per user id
+        profile = _me_cache.get(request.user_id)
+        if profile is not None:
+            return JsonResponse(profile)
+
         db = SessionLocal()
         try:
             user = db.query(User).filter(User.id == request.user_id).first()
             if not user:
                 return JsonResponse({'error': 'User not found'}, status=404)
             
-            return JsonResponse({
+            profile = {
                 'id': user.id,
                 'email': user.email,
                 'isAdmin': is_admin_email(user.email),
-                'createdAt': user.created_at.isoformat() if user.created_at else None
-            })
+                'createdAt': user.created_at
+            }
+            _me_cache.set(user.id, profile)
+            return JsonResponse(profile)
         finally:
             db.close()
 
 
+@method_decorator(csrf_exempt, name='dispatch')
+class LogoutView(View):
+    #Revoke the current token in this process
+
+    @login_required
+    def post(self, request):
+        revoke_token(get_token_from_request(request))
+        return JsonResponse({'success': True})
+
+
 # Wallet Views
 
 class WalletBalanceView(View):
-    #Get user's wallet balances
+    #Get user's wallet balances; cached per user and served with an ETag
     
     @login_required
     def get(self, request):
+        # One primary-key read per request keeps the cache honest across
+        # worker processes: any committed wallet write bumps the version
         db = SessionLocal()
         try:
-            wallets = db.query(Wallet).filter(Wallet.user_id == request.user_id).all()
-            
-            balances = []
-            for wallet in wallets:
-                balances.append({
-                    'tokenMint': wallet.token_mint,
-                    'symbol': wallet.token_symbol,
-                    'name': wallet.token_name,
-                    'icon': wallet.token_icon,
-                    'decimals': wallet.token_decimals,
-                    'balance': wallet.balance
-                })
-            
-            return JsonResponse({'balances': balances})
+            version = balance_version(db, request.user_id)
+            cached = _balance_cache.get(request.user_id, version)
+            if cached is None:
+                wallets = db.query(Wallet).filter(Wallet.user_id == request.user_id).all()
+                
+                balances = []
+                for wallet in wallets:
+                    balances.append({
+                        'tokenMint': wallet.token_mint,
+                        'symbol': wallet.token_symbol,
+                        'name': wallet.token_name,
+                        'icon': wallet.token_icon,
+                        'decimals': wallet.token_decimals,
+                        'balance': wallet.balance
+                    })
+
+                body = json_body({'balances': balances})
+                cached = (etag_for(body), body)
+                _balance_cache.set(request.user_id, version, cached)
         finally:
             db.close()
 
+        etag, body = cached
+        return etag_response(request, body, etag)
+
 
 @method_decorator(csrf_exempt, name='dispatch')
 class DepositView(View):
@@ -526,70 +649,90 @@ class DepositView(View):
         try:
             data = json.loads(request.body)
             token_mint = data.get('tokenMint')
-            amount = data.get('amount', 0)
-            
-            if not token_mint or amount <= 0:
+            try:
+                amount_value = _finite(data.get('amount', 0))
+            except (TypeError, ValueError):
+                amount_value = 0.0
+
+            if not token_mint or amount_value <= 0:
                 return JsonResponse({'error': 'Token mint and positive amount required'}, status=400)
             
-            db = SessionLocal()
-            try:
-                # Find or create wallet for this token
-                wallet = db.query(Wallet).filter(
-                    Wallet.user_id == request.user_id,
-                    Wallet.token_mint == token_mint
-                ).first()
-                
-                if not wallet:
-                    # Find token info from COMMON_TOKENS or use defaults
-                    token_info = next(
-                        (t for t in COMMON_TOKENS if t['mint'] == token_mint),
-                        None
-                    )
-                    
-                    if not token_info:
-                        return JsonResponse({'error': 'Unknown token'}, status=400)
-                    
-                    wallet = Wallet(
-                        user_id=request.user_id,
-                        token_mint=token_mint,
-                        token_symbol=token_info['symbol'],
-                        token_name=token_info['name'],
-                        token_icon=token_info['icon'],
-                        token_decimals=token_info['decimals'],
-                        balance=0.0
-                    )
-                    db.add(wallet)
-                
-                amount_value = float(amount)
-                wallet.balance += amount_value
+            # Token info from COMMON_TOKENS, used only if the wallet is missing
+            token_info = next(
+                (t for t in COMMON_TOKENS if t['mint'] == token_mint),
+                None
+            )
+
+            def deposit(db):
+                credited = credit(db, request.user_id, token_mint, amount_value, token=token_info)
+                if credited is None:
+                    return None
+                symbol, balance = credited
 
                 # Save deposit in transactions log so admin and user can see it
                 _log_user_transaction(
                     db=db,
                     user_id=request.user_id,
                     from_token={'mint': 'cash', 'symbol': 'DEPOSIT'},
-                    to_token={'mint': wallet.token_mint, 'symbol': wallet.token_symbol},
+                    to_token={'mint': token_mint, 'symbol': symbol},
                     from_amount=amount_value,
                     to_amount=amount_value,
-                    usd_value=amount_value * _price_for_symbol(wallet.token_symbol)
+                    usd_value=amount_value * _price_for_symbol(symbol)
                 )
-                db.commit()
-                
-                return JsonResponse({
-                    'success': True,
-                    'newBalance': wallet.balance,
-                    'token': wallet.token_symbol
-                })
-            finally:
-                db.close()
+                return symbol, balance
+
+            result = run_atomic(deposit)
+            if result is None:
+                return JsonResponse({'error': 'Unknown token'}, status=400)
+            symbol, balance = result
+            
+            return JsonResponse({
+                'success': True,
+                'newBalance': balance,
+                'token': symbol
+            })
                 
         except json.JSONDecodeError:
             return JsonResponse({'error': 'Invalid JSON'}, status=400)
+        except LedgerBusy as e:
+            return _busy(e)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
 
 # Swap Views
 
+def _resolve_output_token(user_id, output_mint):
+    # Token info for creating the destination wallet, looked up before the
+    # write transaction so no network call happens while holding locks.
+    token_info = next((t for t in COMMON_TOKENS if t['mint'] == output_mint), None)
+    if token_info:
+        return token_info
+
+    db = SessionLocal()
+    try:
+        if wallet_exists(db, user_id, output_mint):
+            return {'mint': output_mint}
+    finally:
+        db.close()
+
+    # Try to get info from Jupiter search
+    resp = jupiter.get(
+        '/ultra/v1/search',
+        endpoint='token_info',
+        params={'query': output_mint}
+    )
+    tokens = resp.json()
+    if not tokens:
+        return None
+    t = tokens[0]
+    return {
+        'mint': output_mint,
+        'symbol': t.get('symbol', 'UNKNOWN'),
+        'name': t.get('name', 'Unknown Token'),
+        'icon': t.get('icon', ''),
+        'decimals': t.get('decimals', 9)
+    }
+
 @method_decorator(csrf_exempt, name='dispatch')
 class SwapView(View):
     #Execute a mock swap - validate balances locally, use Jupiter for quotes
@@ -600,128 +743,273 @@ class SwapView(View):
             data = json.loads(request.body)
             input_mint = data.get('inputMint')
             output_mint = data.get('outputMint')
-            input_amount = float(data.get('inputAmount', 0))
-            output_amount = float(data.get('outputAmount', 0))
-            slippage = float(data.get('slippage', 0.5))
-            usd_value = float(data.get('usdValue', 0) or 0)
+            try:
+                input_amount = _finite(data.get('inputAmount', 0))
+                output_amount = _finite(data.get('outputAmount', 0))
+                slippage = _finite(data.get('slippage', 0.5))
+                usd_value = _finite(data.get('usdValue', 0) or 0)
+            except (TypeError, ValueError) as e:
+                return JsonResponse({'error': str(e)}, status=400)
             
             if not all([input_mint, output_mint]) or input_amount <= 0:
                 return JsonResponse({'error': 'Invalid swap parameters'}, status=400)
-            
-            db = SessionLocal()
+
             try:
-                # Get source wallet
-                source_wallet = db.query(Wallet).filter(
-                    Wallet.user_id == request.user_id,
-                    Wallet.token_mint == input_mint
-                ).first()
-                
-                if not source_wallet or source_wallet.balance < input_amount:
-                    return JsonResponse({'error': 'Insufficient balance'}, status=400)
-                
-                # Get or create destination wallet
-                dest_wallet = db.query(Wallet).filter(
-                    Wallet.user_id == request.user_id,
-                    Wallet.token_mint == output_mint
-                ).first()
-                
-                if not dest_wallet:
-                    # Find token info
-                    token_info = next(
-                        (t for t in COMMON_TOKENS if t['mint'] == output_mint),
-                        None
-                    )
-                    
-                    if token_info:
-                        dest_wallet = Wallet(
-                            user_id=request.user_id,
-                            token_mint=output_mint,
-                            token_symbol=token_info['symbol'],
-                            token_name=token_info['name'],
-                            token_icon=token_info['icon'],
-                            token_decimals=token_info['decimals'],
-                            balance=0.0
-                        )
-                        db.add(dest_wallet)
-                    else:
-                        # Try to get info from Jupiter search
-                        try:
-                            resp = requests.get(
-                                f'{JUPITER_API_URL}/ultra/v1/search',
-                                params={'query': output_mint},
-                                timeout=5
-                            )
-                            tokens = resp.json()
-                            if tokens and len(tokens) > 0:
-                                t = tokens[0]
-                                dest_wallet = Wallet(
-                                    user_id=request.user_id,
-                                    token_mint=output_mint,
-                                    token_symbol=t.get('symbol', 'UNKNOWN'),
-                                    token_name=t.get('name', 'Unknown Token'),
-                                    token_icon=t.get('icon', ''),
-                                    token_decimals=t.get('decimals', 9),
-                                    balance=0.0
-                                )
-                                db.add(dest_wallet)
-                        except:
-                            return JsonResponse({'error': 'Unknown output token'}, status=400)
-                
-                # Calculate rate
-                rate = output_amount / input_amount if input_amount > 0 else 0
-                fee = 0.3  # 0.3% fee
-                
-                source_wallet.balance -= input_amount
-                dest_wallet.balance += output_amount
+                local_quote = quote(input_mint, output_mint, input_amount, slippage)
+            except QuoteError as e:
+                return JsonResponse({'error': str(e)}, status=400)
+
+            if local_quote:
+                # COMMON_TOKENS pairs are priced here; the client's outputAmount
+                # is only the amount it expects, checked against slippage
+                if output_amount > 0 and local_quote['outAmount'] < output_amount * (1 - slippage / 100):
+                    return JsonResponse({
+                        'error': 'Price moved beyond slippage tolerance',
+                        'quote': local_quote
+                    }, status=409)
+                dest_token = LOCAL_TOKENS[output_mint]
+                output_amount = local_quote['outAmount']
+                rate = local_quote['rate']
+                usd_value = local_quote['inUsdValue']
+            else:
+                try:
+                    dest_token = _resolve_output_token(request.user_id, output_mint)
+                except Exception:
+                    dest_token = None
+                if dest_token is None:
+                    return JsonResponse({'error': 'Unknown output token'}, status=400)
+                rate = output_amount / input_amount
+            fee = SWAP_FEE_BPS / 100  # percent
+
+            def swap(db):
+                # The debit only succeeds if the balance still covers input_amount
+                source_symbol, source_balance = debit(db, request.user_id, input_mint, input_amount)
+                dest_symbol, dest_balance = credit(db, request.user_id, output_mint, output_amount, token=dest_token)
                 
                 # Record transaction
                 transaction = Transaction(
                     user_id=request.user_id,
                     from_token_mint=input_mint,
-                    from_token_symbol=source_wallet.token_symbol,
+                    from_token_symbol=source_symbol,
                     from_amount=input_amount,
                     to_token_mint=output_mint,
-                    to_token_symbol=dest_wallet.token_symbol,
+                    to_token_symbol=dest_symbol,
                     to_amount=output_amount,
                     rate=rate,
                     fee=fee,
                     slippage=slippage,
-                    usd_value=usd_value or (input_amount * _price_for_symbol(source_wallet.token_symbol)),
+                    usd_value=usd_value or (input_amount * _price_for_symbol(source_symbol)),
                     status=TransactionStatus.COMPLETED
                 )
                 db.add(transaction)
-                db.commit()
+                record_transaction(db, transaction)
+                db.flush()
+                return transaction.to_dict(), {
+                    source_symbol: source_balance,
+                    dest_symbol: dest_balance
+                }
+
+            transaction, new_balances = run_atomic(swap)
+            
+            return JsonResponse({
+                'success': True,
+                'transaction': transaction,
+                'newBalances': new_balances
+            })
                 
-                return JsonResponse({
-                    'success': True,
-                    'transaction': transaction.to_dict(),
-                    'newBalances': {
-                        source_wallet.token_symbol: source_wallet.balance,
-                        dest_wallet.token_symbol: dest_wallet.balance
-                    }
-                })
-            finally:
-                db.close()
+        except json.JSONDecodeError:
+            return JsonResponse({'error': 'Invalid JSON'}, status=400)
+        except InsufficientBalance as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        except LedgerBusy as e:
+            return _busy(e)
+        except Exception as e:
+            return JsonResponse({'error': str(e)}, status=500)
+
+
+def _plan_batch(balances, operations):
+    # Validates operations in order against running in-memory balances.
+    # Returns per-operation results, net balance deltas per mint and
+    # (result index, Transaction) pairs for the operations that passed.
+    results = []
+    deltas = defaultdict(float)
+    planned = []
+    for index, op in enumerate(operations):
+        try:
+            op_type = op.get('type')
+            if op_type == 'deposit':
+                token_mint = op.get('tokenMint')
+                amount = _finite(op.get('amount', 0))
+                if token_mint not in LOCAL_TOKENS or amount <= 0:
+                    raise ValueError('Known token mint and positive amount required')
+                symbol = LOCAL_TOKENS[token_mint]['symbol']
+                transaction = Transaction(
+                    from_token_mint='cash',
+                    from_token_symbol='DEPOSIT',
+                    from_amount=amount,
+                    to_token_mint=token_mint,
+                    to_token_symbol=symbol,
+                    to_amount=amount,
+                    rate=1.0,
+                    fee=0.0,
+                    slippage=0.0,
+                    usd_value=amount * _price_for_symbol(symbol)
+                )
+                changes = {token_mint: amount}
+            elif op_type == 'swap':
+                input_mint = op.get('inputMint')
+                output_mint = op.get('outputMint')
+                input_amount = _finite(op.get('inputAmount', 0))
+                expected_amount = _finite(op.get('outputAmount', 0) or 0)
+                slippage = _finite(op.get('slippage', 0.5))
+                local_quote = quote(input_mint, output_mint, input_amount, slippage)
+                if local_quote is None:
+                    raise ValueError('Batch swaps support COMMON_TOKENS pairs only')
+                if balances.get(input_mint, 0.0) < input_amount:
+                    raise ValueError('Insufficient balance')
+                if expected_amount > 0 and local_quote['outAmount'] < expected_amount * (1 - slippage / 100):
+                    raise ValueError('Price moved beyond slippage tolerance')
+                transaction = Transaction(
+                    from_token_mint=input_mint,
+                    from_token_symbol=local_quote['inputSymbol'],
+                    from_amount=input_amount,
+                    to_token_mint=output_mint,
+                    to_token_symbol=local_quote['outputSymbol'],
+                    to_amount=local_quote['outAmount'],
+                    rate=local_quote['rate'],
+                    fee=SWAP_FEE_BPS / 100,
+                    slippage=slippage,
+                    usd_value=local_quote['inUsdValue']
+                )
+                changes = {input_mint: -input_amount, output_mint: local_quote['outAmount']}
+            else:
+                raise ValueError('type must be "deposit" or "swap"')
+        except (ValueError, TypeError, AttributeError) as e:
+            results.append({'index': index, 'success': False, 'error': str(e)})
+            continue
+
+        for mint, change in changes.items():
+            balances[mint] = balances.get(mint, 0.0) + change
+            deltas[mint] += change
+        results.append({'index': index, 'success': True})
+        planned.append((index, transaction))
+    return results, deltas, planned
+
+@method_decorator(csrf_exempt, name='dispatch')
+class BatchView(View):
+    #Run many deposits/swaps for one user with a single auth check and commit
+    
+    @login_required
+    def post(self, request):
+        try:
+            data = json.loads(request.body)
+            operations = data.get('operations')
+            if not isinstance(operations, list) or not operations:
+                return JsonResponse({'error': 'operations must be a non-empty list'}, status=400)
+            if len(operations) > BATCH_MAX_OPERATIONS:
+                return JsonResponse({'error': f'At most {BATCH_MAX_OPERATIONS} operations per batch'}, status=400)
+            if not all(isinstance(op, dict) for op in operations):
+                return JsonResponse({'error': 'Each operation must be an object'}, status=400)
+
+            def apply_batch(db):
+                for token in COMMON_TOKENS:
+                    ensure_wallet(db, request.user_id, token)
+                balances = dict(db.query(Wallet.token_mint, Wallet.balance).filter(
+                    Wallet.user_id == request.user_id
+                ).all())
+                results, deltas, planned = _plan_batch(balances, operations)
+
+                # Net change per wallet as one conditional UPDATE each
+                new_balances = {}
+                for mint, delta in deltas.items():
+                    if delta < 0:
+                        symbol, balance = debit(db, request.user_id, mint, -delta)
+                    else:
+                        symbol, balance = credit(db, request.user_id, mint, delta)
+                    new_balances[symbol] = balance
+
+                transactions = [transaction for _, transaction in planned]
+                for transaction in transactions:
+                    transaction.user_id = request.user_id
+                    transaction.status = TransactionStatus.COMPLETED
+                db.add_all(transactions)
+                record_transactions(db, transactions)
+                db.flush()
+                for index, transaction in planned:
+                    results[index]['transaction'] = transaction.to_dict()
+                return results, new_balances
+
+            results, new_balances = run_atomic(apply_batch)
+            applied = sum(1 for result in results if result['success'])
+            
+            return JsonResponse({
+                'success': True,
+                'applied': applied,
+                'failed': len(results) - applied,
+                'results': results,
+                'newBalances': new_balances
+            })
                 
         except json.JSONDecodeError:
             return JsonResponse({'error': 'Invalid JSON'}, status=400)
+        except InsufficientBalance:
+            # Balances moved between the in-transaction read and the write
+            return JsonResponse({'error': 'Balances changed during the batch, please retry'}, status=409)
+        except LedgerBusy as e:
+            return _busy(e)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
 
 
+class QuoteView(View):
+    #Local quote for COMMON_TOKENS pairs (UI amounts); other pairs use /api/order/
+
+    def get(self, request):
+        input_mint = request.GET.get('inputMint')
+        output_mint = request.GET.get('outputMint')
+        try:
+            amount = float(request.GET.get('amount', 0))
+            slippage = float(request.GET.get('slippage', 0.5))
+        except ValueError:
+            return JsonResponse({'error': 'amount and slippage must be numbers'}, status=400)
+
+        if not all([input_mint, output_mint]):
+            return JsonResponse({'error': 'inputMint, outputMint, and amount are required'}, status=400)
+
+        try:
+            result = quote(input_mint, output_mint, amount, slippage)
+        except QuoteError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        if result is None:
+            return JsonResponse({'error': 'Pair is not priced locally, use /api/order/'}, status=404)
+        return JsonResponse(result)
+
+
 class TransactionListView(View):
-    #Get user's transaction history
+    #Get user's transaction history, newest first, paged with ?before=<nextCursor>
     
     @login_required
     def get(self, request):
+        cursor = request.GET.get('before')
+        try:
+            limit = _page_limit(request, 50, 1, 100)
+            cursor = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
         db = SessionLocal()
         try:
-            transactions = db.query(Transaction).filter(
-                Transaction.user_id == request.user_id
-            ).order_by(Transaction.created_at.desc()).limit(50).all()
+            query = db.query(Transaction).filter(Transaction.user_id == request.user_id)
+            if cursor:
+                query = query.filter(before_cursor(Transaction.created_at, Transaction.id, cursor))
+            transactions = query.order_by(
+                Transaction.created_at.desc(), Transaction.id.desc()
+            ).limit(limit + 1).all()
+            transactions, cursor_out = next_cursor(transactions, limit, key=lambda tx: (tx.created_at, tx.id))
             
             return JsonResponse({
-                'transactions': [t.to_dict() for t in transactions]
+                'transactions': [t.to_dict() for t in transactions],
+                'nextCursor': cursor_out
             })
         finally:
             db.close()
@@ -729,17 +1017,34 @@ class TransactionListView(View):
 # News + Admin Views
 
 class NewsListView(View):
-    #Public news feed
+    #Public news feed, rendered once per change and shared by every visitor
 
     def get(self, request):
+        # The version token is one primary-key read, so a post or delete
+        # handled by any worker process retires every worker's copy
         db = SessionLocal()
         try:
-            ensure_news_seed(db)
-            items = db.query(NewsPost).order_by(NewsPost.created_at.desc()).limit(100).all()
-            return JsonResponse({'items': [item.to_dict() for item in items]})
+            meta = db.get(AppMeta, NEWS_VERSION_META_KEY)
+            if meta is None:
+                ensure_news_seed(db)
+                meta = db.get(AppMeta, NEWS_VERSION_META_KEY)
+            cached = _news_cache.get('feed', meta.value)
+            if cached is None:
+                items = db.query(NewsPost).order_by(NewsPost.created_at.desc()).limit(100).all()
+                body = json_body({'items': [item.to_dict() for item in items]})
+                cached = (etag_for(body), body)
+                _news_cache.set('feed', meta.value, cached)
+            last_modified = meta.updated_at
         finally:
             db.close()
 
+        etag, body = cached
+        return etag_response(
+            request, body, etag,
+            cache_control=f'public, max-age={NEWS_CACHE_MAX_AGE}',
+            last_modified=last_modified
+        )
+
 
 class AdminOverviewView(View):
     #Overall transaction stats for admin profile
@@ -752,17 +1057,15 @@ class AdminOverviewView(View):
 
         db = SessionLocal()
         try:
-            ensure_demo_data(db)
+            ensure_demo_data_once(db)
 
             user_count = db.query(func.count(User.id)).filter(User.email != ADMIN_EMAIL).scalar() or 0
-            transaction_count = db.query(func.count(Transaction.id)).scalar() or 0
-            transactions = db.query(Transaction).all()
-            total_usd = sum(_estimate_tx_usd(tx) for tx in transactions)
-            avg_usd = (total_usd / transaction_count) if transaction_count else 0.0
-
             since = datetime.utcnow() - timedelta(hours=24)
-            daily_txs = db.query(Transaction).filter(Transaction.created_at >= since).all()
-            daily_usd = sum(_estimate_tx_usd(tx) for tx in daily_txs)
+            totals = overview_totals(db, since)
+            transaction_count = totals['transactions']
+            total_usd = totals['totalUsd']
+            avg_usd = (total_usd / transaction_count) if transaction_count else 0.0
+            daily_usd = totals['windowUsd']
 
             return JsonResponse({
                 'users': user_count,
@@ -776,7 +1079,7 @@ class AdminOverviewView(View):
 
 
 class AdminProfilesView(View):
-    #Admin list of up to 25 user profiles with stats
+    #Admin list of user profiles with stats, paged with ?after=<nextCursor>
 
     @login_required
     def get(self, request):
@@ -784,24 +1087,33 @@ class AdminProfilesView(View):
         if guard:
             return guard
 
-        limit = int(request.GET.get('limit', TARGET_DEMO_PROFILES))
-        limit = max(1, min(limit, 100))
+        cursor = request.GET.get('after')
+        try:
+            limit = _page_limit(request, TARGET_DEMO_PROFILES, 1, 100)
+            cursor = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
 
         db = SessionLocal()
         try:
-            ensure_demo_data(db)
-            users = db.query(User).filter(User.email != ADMIN_EMAIL).order_by(User.created_at.asc()).limit(limit).all()
+            ensure_demo_data_once(db)
+            query = db.query(User).filter(User.email != ADMIN_EMAIL)
+            if cursor:
+                query = query.filter(after_cursor(User.created_at, User.id, cursor))
+            users = query.order_by(User.created_at.asc(), User.id.asc()).limit(limit + 1).all()
+            users, cursor_out = next_cursor(users, limit, key=lambda user: (user.created_at, user.id))
 
             return JsonResponse({
-                'profiles': [_user_stats(db, user) for user in users],
-                'limit': limit
+                'profiles': _profile_stats(db, users),
+                'limit': limit,
+                'nextCursor': cursor_out
             })
         finally:
             db.close()
 
 
 class AdminTransactionsView(View):
-    #Admin view for all users transactions
+    #Admin view for all users transactions, paged with ?before=<nextCursor>
 
     @login_required
     def get(self, request):
@@ -809,15 +1121,23 @@ class AdminTransactionsView(View):
         if guard:
             return guard
 
-        limit = int(request.GET.get('limit', 100))
-        limit = max(10, min(limit, 300))
+        cursor = request.GET.get('before')
+        try:
+            limit = _page_limit(request, 100, 10, 300)
+            cursor = decode_cursor(cursor) if cursor else None
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
 
         db = SessionLocal()
         try:
-            ensure_demo_data(db)
-            rows = db.query(Transaction, User.email).join(User, User.id == Transaction.user_id).order_by(
-                Transaction.created_at.desc()
-            ).limit(limit).all()
+            ensure_demo_data_once(db)
+            query = db.query(Transaction, User.email).join(User, User.id == Transaction.user_id)
+            if cursor:
+                query = query.filter(before_cursor(Transaction.created_at, Transaction.id, cursor))
+            rows = query.order_by(
+                Transaction.created_at.desc(), Transaction.id.desc()
+            ).limit(limit + 1).all()
+            rows, cursor_out = next_cursor(rows, limit, key=lambda row: (row[0].created_at, row[0].id))
 
             items = []
             for tx, email in rows:
@@ -826,11 +1146,55 @@ class AdminTransactionsView(View):
                 tx_item['usdValue'] = round(_estimate_tx_usd(tx), 2)
                 items.append(tx_item)
 
-            return JsonResponse({'transactions': items, 'limit': limit})
+            return JsonResponse({'transactions': items, 'limit': limit, 'nextCursor': cursor_out})
         finally:
             db.close()
 
 
+class AdminTransactionsExportView(View):
+    #Streams the whole ledger (or a since/until/user slice) as NDJSON or CSV
+
+    @login_required
+    def get(self, request):
+        guard = _admin_guard(request)
+        if guard:
+            return guard
+
+        fmt = request.GET.get('format', 'ndjson').lower()
+        if fmt not in EXPORT_FORMATS:
+            return JsonResponse({'error': f"format must be one of: {', '.join(EXPORT_FORMATS)}"}, status=400)
+        try:
+            filters = parse_filters(request.GET)
+        except ExportFilterError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        chunks = export_chunks(filters, fmt)
+        if isinstance(request, ASGIRequest):
+            chunks = as_async(chunks)
+        response = StreamingHttpResponse(chunks, content_type=EXPORT_FORMATS[fmt])
+        stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+        response['Content-Disposition'] = f'attachment; filename="transactions-{stamp}.{fmt}"'
+        response['Cache-Control'] = 'no-store'
+        return response
+
+
+class AdminCacheStatsView(View):
+    #Hit/miss counters of the upstream proxy cache and circuit breaker states
+
+    @login_required
+    def get(self, request):
+        guard = _admin_guard(request)
+        if guard:
+            return guard
+        return JsonResponse({
+            'proxyCache': proxy_cache.stats(),
+            'orderCoalescing': order_flight.stats(),
+            'upstreams': upstream_stats(),
+            'balanceCache': _balance_cache.stats(),
+            'ledgerGroupCommit': group_committer.stats() if LEDGER_GROUP_COMMIT else None
+        })
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class AdminNewsView(View):
     #Admin news manager: GET list, POST create
@@ -876,6 +1240,7 @@ class AdminNewsView(View):
                 author_email=getattr(request, 'user_email', ADMIN_EMAIL)
             )
             db.add(post)
+            bump_news_version(db)
             db.commit()
             db.refresh(post)
             return JsonResponse({'success': True, 'item': post.to_dict()})
@@ -900,6 +1265,7 @@ class AdminNewsDeleteView(View):
                 return JsonResponse({'error': 'News item not found'}, status=404)
 
             db.delete(post)
+            bump_news_version(db)
             db.commit()
             return JsonResponse({'success': True})
         except Exception as e:
@@ -910,54 +1276,62 @@ class AdminNewsDeleteView(View):
 # Price Data View
 
 class PriceHistoryView(View):
-    #Get token price history for charts - uses CoinGecko API
-    
-    COINGECKO_IDS = {
-        'SOL': 'solana',
-        'USDC': 'usd-coin',
-        'USDT': 'tether',
-        'BONK': 'bonk',
-        'JUP': 'jupiter-exchange-solana'
-    }
-    
+    #Get token price history for charts - served from the local store, synced from CoinGecko
+
+    COINGECKO_IDS = COINGECKO_IDS
+
     def get(self, request, token):
         days = request.GET.get('days', '1')  # 1, 7, 30, 365
-        # Map token symbol to CoinGecko ID
-        coingecko_id = self.COINGECKO_IDS.get(token.upper(), 'solana')
+        points = parse_points(request.GET.get('points'))
         try:
-            response = requests.get(
-                f'https://api.coingecko.com/api/v3/coins/{coingecko_id}/market_chart',
-                params={
-                    'vs_currency': 'usd',
-                    'days': days
-                },
-                timeout=10
-            )
-            data = response.json()
-            # Extract price data
-            prices = data.get('prices', [])
+            prices = downsample_lttb(load_price_history(token, parse_days(days)), points)
             return JsonResponse({
                 'token': token.upper(),
                 'prices': prices,  # [[timestamp, price], ...]
                 'days': days
             })
         except requests.RequestException as e:
-            return JsonResponse({'error': str(e)}, status=500)
+            return _upstream_error(e)
+
 
+class PricesView(View):
+    #Current USD prices for several tokens in one request
+
+    def get(self, request):
+        raw = request.GET.get('symbols', '')
+        symbols = [s.strip().upper() for s in raw.split(',') if s.strip()] or price_oracle.symbols()
+
+        prices = {}
+        unknown = []
+        for symbol in symbols[:50]:
+            quote = price_oracle.quote(symbol)
+            if quote:
+                prices[symbol] = quote
+            else:
+                unknown.append(symbol)
+
+        return JsonResponse({'prices': prices, 'unknown': unknown})
+
+
+_token_list_body = json_body({'tokens': COMMON_TOKENS})
+_token_list_etag = etag_for(_token_list_body)
+_token_list_modified = datetime.utcnow()
 
 class TokenListView(View):
-    #Get list of common tokens for selection
+    #Get list of common tokens for selection; constant per deploy
     def get(self, request):
-        return JsonResponse({'tokens': COMMON_TOKENS})
+        return etag_response(
+            request, _token_list_body, _token_list_etag,
+            cache_control=f'public, max-age={TOKEN_LIST_MAX_AGE}',
+            last_modified=_token_list_modified
+        )
 
 # Database initialization endpoint (for development)
 class InitDatabaseView(View):
     #Initialize database tables - development only
     def get(self, request):
-        db = SessionLocal()
         try:
-            init_db()
-            ensure_demo_data(db)
+            bootstrap_database()
             return JsonResponse({
                 'success': True,
                 'message': 'Database initialized: demo users, news, and admin 10k USDC prepared',
@@ -968,5 +1342,3 @@ class InitDatabaseView(View):
             })
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=500)
-        finally:
-            db.close()
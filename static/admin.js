@@ -6,7 +6,9 @@ const adminState = {
     transactionsExpanded: false,
     transactionsSortAsc: false, // false = newest first, true = oldest first
     allProfiles: [],
-    allTransactions: []
+    profilesCursor: null,
+    allTransactions: [],
+    transactionsCursor: null
 };
 
 function getToken() {
@@ -89,8 +91,7 @@ function renderProfiles(profiles) {
     }
 
     const visibleCount = adminState.profilesExpanded ? profiles.length : 2;
-    const visibleProfiles = profiles.slice(0, Math.min(visibleCount, 25));
-    // const hiddenCount = Math.min(25, profiles.length) - visibleCount; // Unused now
+    const visibleProfiles = profiles.slice(0, visibleCount);
 
     let html = visibleProfiles.map(profile => `
         <article class="profile-card">
@@ -108,6 +109,16 @@ function renderProfiles(profiles) {
     // Add expand/collapse card if there are more profiles
     if (profiles.length > 2) {
         if (adminState.profilesExpanded) {
+            if (adminState.profilesCursor) {
+                html += `
+                    <div class="profile-action-card" onclick="loadMoreProfiles()">
+                        <svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
+                            <path d="M12 5v14M5 12h14"/>
+                        </svg>
+                        <span>Load more</span>
+                    </div>
+                `;
+            }
             html += `
                 <div class="profile-action-card" onclick="toggleProfilesExpand()">
                     <svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
@@ -122,7 +133,7 @@ function renderProfiles(profiles) {
                     <svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
                         <path d="M6 9l6 6 6-6"/>
                     </svg>
-                    <span>Show all (${Math.min(25, profiles.length)})</span>
+                    <span>Show all (${profiles.length}${adminState.profilesCursor ? '+' : ''})</span>
                 </div>
             `;
         }
@@ -136,6 +147,17 @@ function toggleProfilesExpand() {
     renderProfiles(adminState.allProfiles);
 }
 
+async function loadMoreProfiles() {
+    if (!adminState.profilesCursor) return;
+    try {
+        const data = await apiFetch(`${API_BASE}/admin/profiles/?limit=25&after=${encodeURIComponent(adminState.profilesCursor)}`);
+        adminState.profilesCursor = data.nextCursor || null;
+        renderProfiles(adminState.allProfiles.concat(data.profiles || []));
+    } catch (error) {
+        showToast(error.message || 'Failed to load profiles', 'error');
+    }
+}
+
 function renderTransactions(items) {
     const tbody = document.getElementById('adminTransactionsBody');
     adminState.allTransactions = items;
@@ -169,6 +191,20 @@ function renderTransactions(items) {
     // Add expand/collapse row if there are more transactions
     if (items.length > 1) {
         if (adminState.transactionsExpanded) {
+            if (adminState.transactionsCursor) {
+                html += `
+                    <tr class="expand-collapse-row">
+                        <td colspan="5">
+                            <button class="expand-collapse-btn" onclick="loadMoreTransactions()">
+                                <svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" width="16" height="16">
+                                    <path d="M12 5v14M5 12h14"/>
+                                </svg>
+                                Load older
+                            </button>
+                        </td>
+                    </tr>
+                `;
+            }
             html += `
                 <tr class="expand-collapse-row">
                     <td colspan="5">
@@ -205,6 +241,17 @@ function toggleTransactionsExpand() {
     renderTransactions(adminState.allTransactions);
 }
 
+async function loadMoreTransactions() {
+    if (!adminState.transactionsCursor) return;
+    try {
+        const data = await apiFetch(`${API_BASE}/admin/transactions/?limit=100&before=${encodeURIComponent(adminState.transactionsCursor)}`);
+        adminState.transactionsCursor = data.nextCursor || null;
+        renderTransactions(adminState.allTransactions.concat(data.transactions || []));
+    } catch (error) {
+        showToast(error.message || 'Failed to load transactions', 'error');
+    }
+}
+
 function toggleTransactionsSort() {
     adminState.transactionsSortAsc = !adminState.transactionsSortAsc;
     renderTransactions(adminState.allTransactions);
@@ -348,7 +395,9 @@ async function initAdmin() {
         ]);
 
         renderStats(overview);
+        adminState.profilesCursor = profilesData.nextCursor || null;
         renderProfiles(profilesData.profiles || []);
+        adminState.transactionsCursor = transactionsData.nextCursor || null;
         renderTransactions(transactionsData.transactions || []);
         renderAdminNews(newsData.items || []);
         document.getElementById('newsPublishForm').classList.remove('hidden');
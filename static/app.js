@@ -4,6 +4,7 @@
  */
 
 const API_BASE = '/api';
+const CHART_POINTS = 240; // server-side downsampling target for price charts
 
 // ============================================
 // State Management
@@ -25,7 +26,9 @@ const state = {
     quoteTimeout: null,
     currency: 'USD',
     currencyRates: { USD: 1, EUR: 0.92, RUB: 92.5, KZT: 450 },
-    cryptoSearchTimeout: null
+    cryptoSearchTimeout: null,
+    transactionsCursor: null,
+    transactionsLoading: false
 };
 
 // Common Solana tokens (fallback)
@@ -184,6 +187,13 @@ function showUserMenu() {
 }
 
 function logout() {
+    if (state.token) {
+        // Best effort: revoke the token server-side, the UI logs out regardless
+        fetch(API_BASE + '/auth/logout/', {
+            method: 'POST',
+            headers: { 'Authorization': `Bearer ${state.token}` }
+        }).catch(() => {});
+    }
     localStorage.removeItem('authToken');
     localStorage.removeItem('user');
     state.isAuthenticated = false;
@@ -509,17 +519,31 @@ async function getQuote() {
     // Debounce the quote request
     state.quoteTimeout = setTimeout(async () => {
         try {
-            // Convert to lamports/smallest unit
-            const amountInSmallestUnit = Math.floor(fromAmount * Math.pow(10, state.fromToken.decimals));
-
-            const response = await fetch(
-                `${API_BASE}/order/?inputMint=${state.fromToken.mint}&outputMint=${state.toToken.mint}&amount=${amountInSmallestUnit}`
+            // Common token pairs are priced by the server itself (UI units);
+            // only pairs it doesn't price (404) fall back to a Jupiter order quote.
+            // Any other error (e.g. 400 for a bad amount) is shown as-is.
+            let data;
+            let outAmount;
+            const localResponse = await fetch(
+                `${API_BASE}/quote/?inputMint=${state.fromToken.mint}&outputMint=${state.toToken.mint}&amount=${fromAmount}&slippage=${state.slippage}`
             );
 
-            const data = await response.json();
+            if (localResponse.status !== 404) {
+                data = await localResponse.json();
+                outAmount = data.outAmount;
+            } else {
+                // Convert to lamports/smallest unit
+                const amountInSmallestUnit = Math.floor(fromAmount * Math.pow(10, state.fromToken.decimals));
+
+                const response = await fetch(
+                    `${API_BASE}/order/?inputMint=${state.fromToken.mint}&outputMint=${state.toToken.mint}&amount=${amountInSmallestUnit}`
+                );
+
+                data = await response.json();
+                outAmount = parseFloat(data.outAmount) / Math.pow(10, state.toToken.decimals);
+            }
 
             if (data.outAmount) {
-                const outAmount = parseFloat(data.outAmount) / Math.pow(10, state.toToken.decimals);
                 document.getElementById('toAmount').value = outAmount.toFixed(6);
 
                 // Calculate rate
@@ -536,6 +560,7 @@ async function getQuote() {
                 document.getElementById('swapFee').textContent = `${(data.feeBps || 30) / 100}%`;
                 document.getElementById('swapSlippage').textContent = `${state.slippage}%`;
             } else if (data.error || data.errorMessage) {
+                document.getElementById('toAmount').value = '';
                 showToast(data.error || data.errorMessage || 'Failed to get quote', 'error');
             }
 
@@ -656,52 +681,81 @@ async function executeSwap() {
 // Transactions
 // ============================================
 
-async function loadTransactions() {
+const TRANSACTIONS_PAGE_SIZE = 10;
+
+function renderTransactionItem(tx) {
+    return `
+        <div class="transaction-item">
+            <div class="transaction-tokens">
+                <span>${tx.fromToken}</span>
+                <span class="transaction-arrow">→</span>
+                <span>${tx.toToken}</span>
+                <span class="transaction-amount">${formatNumber(tx.fromAmount, 4)} → ${formatNumber(tx.toAmount, 4)}</span>
+            </div>
+            <div class="transaction-meta">
+                <span class="transaction-usd">${formatUSD(tx.usdValue || 0)}</span>
+                <span class="transaction-time">
+                    <svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
+                        <circle cx="12" cy="12" r="10"/>
+                        <path d="M12 6v6l4 2"/>
+                    </svg>
+                    ${getTimeAgo(tx.createdAt)}
+                </span>
+                <span class="transaction-status ${tx.status}">${tx.status}</span>
+            </div>
+        </div>
+    `;
+}
+
+async function loadTransactions(append = false) {
     const container = document.getElementById('transactionsList');
 
     if (!state.isAuthenticated) {
+        state.transactionsCursor = null;
         container.innerHTML = '<div class="transaction-empty">Login to see your transactions</div>';
         return;
     }
+    if (append && (!state.transactionsCursor || state.transactionsLoading)) return;
 
+    state.transactionsLoading = true;
     try {
-        const response = await fetch(API_BASE + '/transactions/', {
+        let url = `${API_BASE}/transactions/?limit=${TRANSACTIONS_PAGE_SIZE}`;
+        if (append) url += `&before=${encodeURIComponent(state.transactionsCursor)}`;
+        const response = await fetch(url, {
             headers: { 'Authorization': `Bearer ${state.token}` }
         });
 
         const data = await response.json();
+        const items = data.transactions || [];
+        state.transactionsCursor = data.nextCursor || null;
 
-        if (data.transactions && data.transactions.length > 0) {
-            container.innerHTML = data.transactions.slice(0, 10).map(tx => `
-                <div class="transaction-item">
-                    <div class="transaction-tokens">
-                        <span>${tx.fromToken}</span>
-                        <span class="transaction-arrow">→</span>
-                        <span>${tx.toToken}</span>
-                        <span class="transaction-amount">${formatNumber(tx.fromAmount, 4)} → ${formatNumber(tx.toAmount, 4)}</span>
-                    </div>
-                    <div class="transaction-meta">
-                        <span class="transaction-usd">${formatUSD(tx.usdValue || 0)}</span>
-                        <span class="transaction-time">
-                            <svg viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
-                                <circle cx="12" cy="12" r="10"/>
-                                <path d="M12 6v6l4 2"/>
-                            </svg>
-                            ${getTimeAgo(tx.createdAt)}
-                        </span>
-                        <span class="transaction-status ${tx.status}">${tx.status}</span>
-                    </div>
-                </div>
-            `).join('');
+        if (append) {
+            container.insertAdjacentHTML('beforeend', items.map(renderTransactionItem).join(''));
+        } else if (items.length > 0) {
+            container.innerHTML = items.map(renderTransactionItem).join('');
         } else {
             container.innerHTML = '<div class="transaction-empty">No transactions yet</div>';
         }
     } catch (error) {
         console.error('Failed to load transactions:', error);
-        container.innerHTML = '<div class="transaction-empty">Failed to load transactions</div>';
+        if (!append) {
+            container.innerHTML = '<div class="transaction-empty">Failed to load transactions</div>';
+        }
+    } finally {
+        state.transactionsLoading = false;
     }
 }
 
+function initTransactionsScroll() {
+    // Infinite scroll: fetch the next page when the list is scrolled near its end
+    const container = document.getElementById('transactionsList');
+    container.addEventListener('scroll', () => {
+        if (container.scrollTop + container.clientHeight >= container.scrollHeight - 40) {
+            loadTransactions(true);
+        }
+    });
+}
+
 // ============================================
 // Price Chart
 // ============================================
@@ -712,7 +766,7 @@ function updateChartPair() {
 
 async function loadPriceChart() {
     try {
-        const response = await fetch(`${API_BASE}/price/${state.chartToken}/?days=${state.chartDays}`);
+        const response = await fetch(`${API_BASE}/price/${state.chartToken}/?days=${state.chartDays}&points=${CHART_POINTS}`);
         const data = await response.json();
 
         if (data.prices && data.prices.length > 0) {
@@ -951,6 +1005,7 @@ function initEventListeners() {
 
 async function init() {
     initEventListeners();
+    initTransactionsScroll();
     initDefaultTokens();
     loadAuthState();
     updateChartPair();